@@ -3,10 +3,12 @@ Applications API Blueprint
 Manages applications within virtual hosts
 """
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 
-from models import User, AuditLog
+from models import AuditLog
 from services.ome_client import OMEAPIException
+from services import audit_queue, ome_cache
+from services.current_user import current_user_id, jwt_has_permission
 
 applications_bp = Blueprint('applications', __name__)
 
@@ -16,7 +18,7 @@ applications_bp = Blueprint('applications', __name__)
 def list_apps(vhost_name):
     """List all applications in a virtual host"""
     try:
-        apps = current_app.ome_client.list_apps(vhost_name)
+        apps = ome_cache.cached_list_apps(vhost_name)
         return jsonify(apps), 200
     except OMEAPIException as e:
         return jsonify({'error': str(e)}), 500
@@ -27,7 +29,7 @@ def list_apps(vhost_name):
 def get_app(vhost_name, app_name):
     """Get details of a specific application"""
     try:
-        app = current_app.ome_client.get_app(vhost_name, app_name)
+        app = ome_cache.cached_get_app(vhost_name, app_name)
         return jsonify(app), 200
     except OMEAPIException as e:
         return jsonify({'error': str(e)}), 404
@@ -37,10 +39,9 @@ def get_app(vhost_name, app_name):
 @jwt_required()
 def create_app(vhost_name):
     """Create a new application"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user_id = current_user_id()
     
-    if not user or not user.has_permission('write'):
+    if not jwt_has_permission('write'):
         return jsonify({'error': 'Unauthorized'}), 403
     
     data = request.get_json()
@@ -49,17 +50,18 @@ def create_app(vhost_name):
     
     try:
         result = current_app.ome_client.create_app(vhost_name, data)
+        ome_cache.invalidate_app(vhost_name, data.get('name'))
         
         # Log action
-        AuditLog.log_action(
-            user_id=user.id,
+        audit_queue.enqueue(dict(
+            user_id=user_id,
             action=AuditLog.ACTION_CREATE,
             resource_type='application',
             resource_id=f"{vhost_name}/{data.get('name')}",
             description=f"Created application: {data.get('name')} in {vhost_name}",
             ip_address=request.remote_addr,
             user_agent=request.headers.get('User-Agent')
-        )
+        ))
         
         return jsonify(result), 201
         
@@ -71,10 +73,9 @@ def create_app(vhost_name):
 @jwt_required()
 def update_app(vhost_name, app_name):
     """Update an existing application"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user_id = current_user_id()
     
-    if not user or not user.has_permission('write'):
+    if not jwt_has_permission('write'):
         return jsonify({'error': 'Unauthorized'}), 403
     
     data = request.get_json()
@@ -83,17 +84,18 @@ def update_app(vhost_name, app_name):
     
     try:
         result = current_app.ome_client.update_app(vhost_name, app_name, data)
+        ome_cache.invalidate_app(vhost_name, app_name)
         
         # Log action
-        AuditLog.log_action(
-            user_id=user.id,
+        audit_queue.enqueue(dict(
+            user_id=user_id,
             action=AuditLog.ACTION_UPDATE,
             resource_type='application',
             resource_id=f"{vhost_name}/{app_name}",
             description=f"Updated application: {app_name} in {vhost_name}",
             ip_address=request.remote_addr,
             user_agent=request.headers.get('User-Agent')
-        )
+        ))
         
         return jsonify(result), 200
         
@@ -105,28 +107,29 @@ def update_app(vhost_name, app_name):
 @jwt_required()
 def delete_app(vhost_name, app_name):
     """Delete an application"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user_id = current_user_id()
     
-    if not user or not user.has_permission('delete'):
+    if not jwt_has_permission('delete'):
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
         success = current_app.ome_client.delete_app(vhost_name, app_name)
         
         if success:
+            ome_cache.invalidate_app(vhost_name, app_name)
+            
             # Log action
-            AuditLog.log_action(
-                user_id=user.id,
+            audit_queue.enqueue(dict(
+                user_id=user_id,
                 action=AuditLog.ACTION_DELETE,
                 resource_type='application',
                 resource_id=f"{vhost_name}/{app_name}",
                 description=f"Deleted application: {app_name} from {vhost_name}",
                 ip_address=request.remote_addr,
                 user_agent=request.headers.get('User-Agent')
-            )
+            ))
             
-            return jsonify({'message': 'Application deleted'}), 200
+            return '', 204
         else:
             return jsonify({'error': 'Failed to delete application'}), 500
             
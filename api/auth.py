@@ -12,6 +12,9 @@ from flask_jwt_extended import (
 from datetime import datetime
 
 from models import db, User, AuditLog
+from services import audit_queue
+from services.current_user import current_user_id, jwt_is_admin, current_user
+from services.json_provider import json_response, rows_to_dicts
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -47,7 +50,7 @@ def login():
     if not user or not user.check_password(password):
         # Log failed attempt
         if user:
-            AuditLog.log_action(
+            audit_queue.enqueue(dict(
                 user_id=user.id,
                 action=AuditLog.ACTION_LOGIN,
                 resource_type='auth',
@@ -56,28 +59,36 @@ def login():
                 user_agent=request.headers.get('User-Agent'),
                 status='failure',
                 error_message='Invalid password'
-            )
+            ))
         return jsonify({'error': 'Invalid credentials'}), 401
     
     if not user.is_active:
         return jsonify({'error': 'Account is disabled'}), 403
     
     # Create access token
-    access_token = create_access_token(identity=user.id)
+    # Embed role and permissions so handlers can authorize without a DB lookup
+    access_token = create_access_token(
+        identity=user.id,
+        additional_claims={'role': user.role, 'perms': user.get_permissions()}
+    )
+    
+    # Upgrade legacy bcrypt hashes now that the plain password is known
+    if user.password_needs_rehash():
+        user.set_password(password)
     
     # Update last login
     user.last_login = datetime.utcnow()
     db.session.commit()
     
     # Log successful login
-    AuditLog.log_action(
+    audit_queue.enqueue(dict(
         user_id=user.id,
         action=AuditLog.ACTION_LOGIN,
         resource_type='auth',
         description='Successful login',
         ip_address=request.remote_addr,
         user_agent=request.headers.get('User-Agent')
-    )
+    ))
     
     return jsonify({
         'access_token': access_token,
@@ -94,14 +105,14 @@ def logout():
     user_id = get_jwt_identity()
     
     # Log logout
-    AuditLog.log_action(
+    audit_queue.enqueue(dict(
         user_id=user_id,
         action=AuditLog.ACTION_LOGOUT,
         resource_type='auth',
         description='User logged out',
         ip_address=request.remote_addr,
         user_agent=request.headers.get('User-Agent')
-    )
+    ))
     
     return jsonify({'message': 'Logged out successfully'}), 200
 
@@ -115,8 +126,7 @@ def get_current_user():
     Returns:
         User object as JSON
     """
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_user()
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
@@ -130,14 +140,11 @@ def list_users():
     """
     List all users (admin only)
     """
-    user_id = get_jwt_identity()
-    current_user = User.query.get(user_id)
-    
-    if not current_user or not current_user.is_admin():
+    if not jwt_is_admin():
         return jsonify({'error': 'Unauthorized'}), 403
     
     users = User.query.all()
-    return jsonify([user.to_dict() for user in users]), 200
+    return json_response(rows_to_dicts(users, User.JSON_FIELDS))
 
 
 @auth_bp.route('/users', methods=['POST'])
@@ -154,10 +161,9 @@ def create_user():
             "role": "admin|operator|viewer"
         }
     """
-    user_id = get_jwt_identity()
-    current_user = User.query.get(user_id)
+    user_id = current_user_id()
     
-    if not current_user or not current_user.is_admin():
+    if not jwt_is_admin():
         return jsonify({'error': 'Unauthorized'}), 403
     
     data = request.get_json()
@@ -190,14 +196,14 @@ def create_user():
     db.session.commit()
     
     # Log action
-    AuditLog.log_action(
-        user_id=current_user.id,
+    audit_queue.enqueue(dict(
+        user_id=user_id,
         action=AuditLog.ACTION_CREATE,
         resource_type='user',
         resource_id=str(new_user.id),
         description=f'Created user: {new_user.username}',
         ip_address=request.remote_addr,
         user_agent=request.headers.get('User-Agent')
-    )
+    ))
     
     return jsonify(new_user.to_dict()), 201
@@ -2,13 +2,24 @@
 Logs API Blueprint
 Access to audit logs and OvenMediaEngine logs
 """
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime
 
-from models import User, AuditLog
+import orjson
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func, and_, or_
+
+from models import db, AuditLog
+from services import audit_queue
+from services.current_user import jwt_is_operator
+from services.json_provider import json_response, rows_to_dicts, rows_to_json
 
 logs_bp = Blueprint('logs', __name__)
 
+# Pages larger than this are streamed row by row
+STREAM_THRESHOLD = 100
+
 
 @logs_bp.route('/audit', methods=['GET'])
 @jwt_required()
@@ -19,46 +30,122 @@ def get_audit_logs():
     Query parameters:
         - limit: int (default 50, max 200)
         - offset: int (default 0)
+        - cursor: next_cursor of the previous page (keyset pagination,
+          takes precedence over offset)
         - action: filter by action type
         - user_id: filter by user
         - resource_type: filter by resource type
     """
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
     # Only admins and operators can view audit logs
-    if not user or not user.is_operator():
+    if not jwt_is_operator():
         return jsonify({'error': 'Unauthorized'}), 403
     
     # Get query parameters
-    limit = min(int(request.args.get('limit', 50)), 200)
+    limit = max(min(int(request.args.get('limit', 50)), 200), 1)
     offset = int(request.args.get('offset', 0))
+    cursor = request.args.get('cursor')
     action = request.args.get('action')
     filter_user_id = request.args.get('user_id')
     resource_type = request.args.get('resource_type')
     
-    # Build query
-    query = AuditLog.query
-    
+    # Build filters
+    filters = []
     if action:
-        query = query.filter_by(action=action)
+        filters.append(AuditLog.action == action)
     if filter_user_id:
-        query = query.filter_by(user_id=int(filter_user_id))
+        filters.append(AuditLog.user_id == int(filter_user_id))
     if resource_type:
-        query = query.filter_by(resource_type=resource_type)
+        filters.append(AuditLog.resource_type == resource_type)
     
-    # Get total count
-    total = query.count()
+    # Get total count (plain COUNT instead of wrapping the query in a subquery),
+    # cached briefly since it scans every matching row. Other workers' writes
+    # do not drop this process's cache, so the total is also never reported
+    # below the rows already seen.
+    count_key = (action, filter_user_id, resource_type)
+    total = audit_queue.totals.get(count_key)
+    if total is None:
+        total = db.session.query(func.count(AuditLog.id)).filter(*filters).scalar()
+        audit_queue.totals.set(count_key, total)
+    # A cursor page follows rows of unknown count, so only its own rows count
+    seen = 0 if cursor else offset
     
-    # Get logs
-    logs = query.order_by(AuditLog.timestamp.desc())\
-                .offset(offset)\
-                .limit(limit)\
-                .all()
+    # Get logs, one extra row tells whether another page exists
+    query = AuditLog.query.filter(*filters)\
+                .order_by(AuditLog.timestamp.desc(), AuditLog.id.desc())
+    if cursor:
+        try:
+            cursor_ts, cursor_id = _parse_cursor(cursor)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        if cursor_id is None:
+            query = query.filter(AuditLog.timestamp < cursor_ts)
+        else:
+            query = query.filter(or_(
+                AuditLog.timestamp < cursor_ts,
+                and_(AuditLog.timestamp == cursor_ts, AuditLog.id < cursor_id)
+            ))
+    else:
+        query = query.offset(offset)
     
-    return jsonify({
-        'total': total,
+    if limit > STREAM_THRESHOLD:
+        meta = {'total': total, 'limit': limit, 'offset': offset}
+        return Response(
+            stream_with_context(_stream_audit_logs(query, limit, meta, seen)),
+            mimetype='application/json'
+        )
+    
+    logs = query.limit(limit + 1).all()
+    
+    has_more = len(logs) > limit
+    logs = logs[:limit]
+    next_cursor = f"{logs[-1].timestamp.isoformat()},{logs[-1].id}" if has_more else None
+    
+    return json_response({
+        'total': max(total, seen + len(logs) + has_more),
         'limit': limit,
         'offset': offset,
-        'logs': [log.to_dict() for log in logs]
-    }), 200
+        'has_more': has_more,
+        'next_cursor': next_cursor,
+        'logs': rows_to_dicts(logs, AuditLog.JSON_FIELDS)
+    })
+
+
+def _stream_audit_logs(query, limit, meta, seen):
+    """
+    Yield an audit log page as JSON without holding every row in memory
+    
+    The logs array is written first, has_more and next_cursor follow it
+    once the extra row has been seen. seen is the number of rows before
+    this page; the reported total is never below the rows seen so far.
+    """
+    last = None
+    count = 0
+    has_more = False
+    
+    yield b'{"logs":['
+    for log in query.limit(limit + 1).yield_per(STREAM_THRESHOLD):
+        if count == limit:
+            has_more = True
+            break
+        yield (b',' if count else b'') + rows_to_json([log], AuditLog.JSON_FIELDS)[1:-1]
+        last = log
+        count += 1
+    
+    meta['total'] = max(meta['total'], seen + count + has_more)
+    meta['has_more'] = has_more
+    meta['next_cursor'] = f"{last.timestamp.isoformat()},{last.id}" if has_more else None
+    yield b'],' + orjson.dumps(meta)[1:] + b'\n'
+
+
+def _parse_cursor(cursor):
+    """
+    Parse a pagination cursor of the form "<iso-timestamp>[,<id>]"
+    
+    Returns:
+        Tuple of (timestamp, id or None)
+        
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    timestamp, _, log_id = cursor.partition(',')
+    return datetime.fromisoformat(timestamp), int(log_id) if log_id else None
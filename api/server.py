@@ -2,21 +2,51 @@
 Server Configuration API Blueprint
 Manages Server.xml configuration
 """
+import os
+
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 
-from models import db, User, ConfigurationSnapshot, AuditLog
-from services import ConfigManager, XMLParser
+from models import db, ConfigurationSnapshot, AuditLog
+from services import XMLParser, audit_queue, ome_cache
+from services.ome_client import OMEAPIException
+from services.current_user import current_user_id, jwt_has_permission
+from services.json_provider import json_response, rows_to_dicts
 
 server_bp = Blueprint('server', __name__)
 
+# Last (key, raw_xml, server_info) served by get_config, keyed by file path and stat
+_cfg_cache = None
+
+
+def read_config_payload(config_manager):
+    """
+    Read raw Server.xml and its server info, reusing the cached copy
+    while the file is unchanged on disk
+    
+    Returns:
+        Tuple of (raw_xml, server_info)
+    """
+    global _cfg_cache
+    
+    path = config_manager.xml_path
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    
+    cached = _cfg_cache
+    if cached is None or cached[0] != key:
+        with open(path, 'r') as f:
+            raw_xml = f.read()
+        server_info = config_manager.get_server_info()
+        cached = _cfg_cache = (key, raw_xml, server_info)
+    
+    return cached[1], cached[2]
+
 
-def get_config_manager():
-    """Get ConfigManager instance with current app config"""
-    return ConfigManager(
-        xml_path=current_app.config['OME_SERVER_XML_PATH'],
-        ome_client=current_app.ome_client
-    )
+def invalidate_config_cache():
+    """Drop the cached configuration after Server.xml is written"""
+    global _cfg_cache
+    _cfg_cache = None
 
 
 @server_bp.route('/config', methods=['GET'])
@@ -29,12 +59,9 @@ def get_config():
         Complete Server.xml content
     """
     try:
-        config_manager = get_config_manager()
+        config_manager = current_app.config_manager
         # We need raw XML for the editor
-        with open(config_manager.xml_path, 'r') as f:
-            raw_xml = f.read()
-            
-        server_info = config_manager.get_server_info()
+        raw_xml, server_info = read_config_payload(config_manager)
         
         return jsonify({
             'config': raw_xml,
@@ -44,7 +71,7 @@ def get_config():
     except FileNotFoundError as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        current_app.logger.error(f"Error reading config: {str(e)}")
+        current_app.logger.error("Error reading config: %s", e)
         return jsonify({'error': 'Failed to read configuration'}), 500
 
 
@@ -60,11 +87,10 @@ def update_config():
             "description": "string" (optional)
         }
     """
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user_id = current_user_id()
     
     # Check permissions
-    if not user or not user.has_permission('write'):
+    if not jwt_has_permission('write'):
         return jsonify({'error': 'Unauthorized'}), 403
     
     data = request.get_json()
@@ -72,7 +98,7 @@ def update_config():
         return jsonify({'error': 'Configuration data required'}), 400
     
     try:
-        config_manager = get_config_manager()
+        config_manager = current_app.config_manager
         new_config_xml = data['config']
         
         # Validate XML structure
@@ -80,10 +106,10 @@ def update_config():
         if not is_valid:
             return jsonify({'error': f'Invalid XML: {error}'}), 400
         
-        # Create snapshot before updating
-        with open(config_manager.xml_path, 'r') as f:
-            old_config_xml = f.read()
-            
+        # Save the current configuration before replacing it, so a failed
+        # commit never leaves Server.xml changed without a snapshot
+        old_config_xml, _ = read_config_payload(config_manager)
+        
         version = ConfigurationSnapshot.get_latest_version() + 1
         
         snapshot = ConfigurationSnapshot(
@@ -91,26 +117,33 @@ def update_config():
             description=data.get('description', 'Configuration update'),
             configuration_type='server_xml',
             configuration_data=old_config_xml,
-            user_id=user.id
+            user_id=user_id
         )
         db.session.add(snapshot)
         
-        # Write new configuration directly as file
-        with open(config_manager.xml_path, 'w') as f:
-            f.write(new_config_xml)
-        
         # Commit snapshot
         db.session.commit()
         
+        # Write new configuration
+        try:
+            config_manager.replace_raw_config(new_config_xml)
+        except Exception:
+            # Nothing was changed, so the snapshot would only duplicate the current file
+            db.session.delete(snapshot)
+            db.session.commit()
+            raise
+        finally:
+            invalidate_config_cache()
+        
         # Log action
-        AuditLog.log_action(
-            user_id=user.id,
+        audit_queue.enqueue(dict(
+            user_id=user_id,
             action=AuditLog.ACTION_UPDATE,
             resource_type='server_config',
             description=data.get('description', 'Updated server configuration'),
             ip_address=request.remote_addr,
             user_agent=request.headers.get('User-Agent')
-        )
+        ))
         
         return jsonify({
             'message': 'Configuration updated successfully',
@@ -119,7 +152,7 @@ def update_config():
         
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error updating config: {str(e)}")
+        current_app.logger.error("Error updating config: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -130,7 +163,7 @@ def get_status():
     Get OvenMediaEngine server status
     """
     try:
-        config_manager = get_config_manager()
+        config_manager = current_app.config_manager
         is_connected, error = config_manager.test_ome_connection()
         
         result = {
@@ -144,9 +177,8 @@ def get_status():
         # Try to get server stats
         if is_connected:
             try:
-                stats = current_app.ome_client.get_server_stats()
-                result['stats'] = stats
-            except:
+                result['stats'] = ome_cache.cached_server_stats()
+            except OMEAPIException:
                 pass
         
         return jsonify(result), 200
@@ -159,11 +191,14 @@ def get_status():
 @jwt_required()
 def list_snapshots():
     """Get list of configuration snapshots"""
-    snapshots = ConfigurationSnapshot.query.order_by(
+    # Select only the listed columns; the payload is never needed here
+    snapshots = ConfigurationSnapshot.query.options(
+        db.load_only(*(getattr(ConfigurationSnapshot, f) for f in ConfigurationSnapshot.JSON_FIELDS))
+    ).order_by(
         ConfigurationSnapshot.created_at.desc()
     ).limit(50).all()
     
-    return jsonify([s.to_dict() for s in snapshots]), 200
+    return json_response(rows_to_dicts(snapshots, ConfigurationSnapshot.JSON_FIELDS))
 
 
 @server_bp.route('/snapshots/<int:snapshot_id>/restore', methods=['POST'])
@@ -172,35 +207,35 @@ def restore_snapshot(snapshot_id):
     """
     Restore configuration from snapshot
     """
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user_id = current_user_id()
     
-    if not user or not user.has_permission('write'):
+    if not jwt_has_permission('write'):
         return jsonify({'error': 'Unauthorized'}), 403
     
-    snapshot = ConfigurationSnapshot.query.get(snapshot_id)
+    snapshot = db.session.get(ConfigurationSnapshot, snapshot_id)
     if not snapshot:
         return jsonify({'error': 'Snapshot not found'}), 404
     
     try:
-        config_manager = get_config_manager()
+        config_manager = current_app.config_manager
         
         # Restore from snapshot
         config_manager.restore_from_snapshot(snapshot.configuration_data)
+        invalidate_config_cache()
         
         # Activate this snapshot
         snapshot.activate()
         
         # Log action
-        AuditLog.log_action(
-            user_id=user.id,
+        audit_queue.enqueue(dict(
+            user_id=user_id,
             action=AuditLog.ACTION_ROLLBACK,
             resource_type='server_config',
             resource_id=str(snapshot_id),
             description=f'Restored configuration to version {snapshot.version}',
             ip_address=request.remote_addr,
             user_agent=request.headers.get('User-Agent')
-        )
+        ))
         
         return jsonify({
             'message': 'Configuration restored successfully',
@@ -208,5 +243,5 @@ def restore_snapshot(snapshot_id):
         }), 200
         
     except Exception as e:
-        current_app.logger.error(f"Error restoring snapshot: {str(e)}")
+        current_app.logger.error("Error restoring snapshot: %s", e)
         return jsonify({'error': str(e)}), 500
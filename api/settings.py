@@ -3,12 +3,42 @@ Settings API Blueprint
 Manages application settings stored in database
 """
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 
-from models import db, User, Settings, AuditLog
+from config import Config
+from models import db, Settings, AuditLog
+from services import OMEClient, ConfigManager, audit_queue, ome_cache
+from services.current_user import current_user_id, jwt_is_admin, jwt_is_operator
 
 settings_bp = Blueprint('settings', __name__)
 
+# Setting keys that Config.init_app copies into app.config
+_APP_CONFIG_KEYS = {
+    'secret_key', 'jwt_secret_key', 'jwt_token_expires',
+    'ome_server_xml_path', 'ome_api_url', 'ome_api_access_token',
+    'items_per_page', 'log_level'
+}
+
+
+def refresh_services():
+    """
+    Rebuild the OME client and config manager if their settings changed
+    
+    Keeping the existing client preserves its pooled connections.
+    """
+    api_url = current_app.config['OME_API_URL']
+    access_token = current_app.config['OME_API_ACCESS_TOKEN']
+    client = current_app.ome_client
+    
+    if client.api_url != api_url.rstrip('/') or client.access_token != access_token:
+        client = current_app.ome_client = OMEClient(api_url, access_token)
+        ome_cache.clear()
+    
+    xml_path = current_app.config['OME_SERVER_XML_PATH']
+    config_manager = current_app.config_manager
+    if config_manager.xml_path != xml_path or config_manager.ome_client is not client:
+        current_app.config_manager = ConfigManager(xml_path, client)
+
 
 @settings_bp.route('/', methods=['GET'])
 @jwt_required()
@@ -17,17 +47,11 @@ def get_all_settings():
     Get all settings grouped by category
     Secrets are hidden unless user is admin
     """
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
-    
     # Only admins can view all settings
-    if not user.is_operator():
+    if not jwt_is_operator():
         return jsonify({'error': 'Unauthorized'}), 403
     
-    is_admin = user.is_admin()
+    is_admin = jwt_is_admin()
     
     # Get all settings grouped by category
     categories = {}
@@ -43,17 +67,14 @@ def get_all_settings():
 @jwt_required()
 def get_setting(key):
     """Get a specific setting"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user or not user.is_operator():
+    if not jwt_is_operator():
         return jsonify({'error': 'Unauthorized'}), 403
     
     setting = Settings.query.filter_by(key=key).first()
     if not setting:
         return jsonify({'error': 'Setting not found'}), 404
     
-    return jsonify(setting.to_dict(include_secret=user.is_admin())), 200
+    return jsonify(setting.to_dict(include_secret=jwt_is_admin())), 200
 
 
 @settings_bp.route('/', methods=['PUT'])
@@ -70,56 +91,68 @@ def update_settings():
             ]
         }
     """
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user_id = current_user_id()
     
     # Only admins can update settings
-    if not user or not user.is_admin():
+    if not jwt_is_admin():
         return jsonify({'error': 'Unauthorized - Admin access required'}), 403
     
     data = request.get_json()
     if not data or 'settings' not in data:
         return jsonify({'error': 'Settings data required'}), 400
     
+    items = [item for item in data['settings'] if 'key' in item and 'value' in item]
+    keys = [item['key'] for item in items]
+    settings = {s.key: s for s in Settings.query.filter(Settings.key.in_(keys)).all()} if keys else {}
+    
     updated = []
     errors = []
+    audit_entries = []
     
     for item in data['settings']:
         if 'key' not in item or 'value' not in item:
             errors.append({'error': 'Missing key or value', 'item': item})
             continue
         
+        setting = settings.get(item['key'])
+        if not setting:
+            errors.append({'error': 'Setting not found', 'key': item['key']})
+            continue
+        
+        old_value = setting.value
+        setting.value = item['value']
+        setting.updated_by = user_id
+        updated.append(item['key'])
+        
+        audit_entries.append(dict(
+            user_id=user_id,
+            action=AuditLog.ACTION_UPDATE,
+            resource_type='setting',
+            resource_id=item['key'],
+            description=f"Updated setting {item['key']} from '{old_value}' to '{item['value']}'",
+            ip_address=request.remote_addr,
+            user_agent=request.headers.get('User-Agent')
+        ))
+    
+    if updated:
+        # Commit all changes together with their audit entries, so the
+        # log shows them immediately
         try:
-            setting = Settings.query.filter_by(key=item['key']).first()
-            if setting:
-                old_value = setting.value
-                setting.value = item['value']
-                setting.updated_by = user.id
-                db.session.commit()
-                
-                updated.append(item['key'])
-                
-                # Log the change
-                AuditLog.log_action(
-                    user_id=user.id,
-                    action=AuditLog.ACTION_UPDATE,
-                    resource_type='setting',
-                    resource_id=item['key'],
-                    description=f"Updated setting {item['key']} from '{old_value}' to '{item['value']}'",
-                    ip_address=request.remote_addr,
-                    user_agent=request.headers.get('User-Agent')
-                )
-            else:
-                errors.append({'error': 'Setting not found', 'key': item['key']})
+            db.session.bulk_insert_mappings(AuditLog, audit_entries)
+            db.session.commit()
         except Exception as e:
-            errors.append({'error': str(e), 'key': item['key']})
             db.session.rollback()
-    
-    # Reload configuration in current app
-    try:
-        current_app.config.init_app(current_app)
-    except:
-        pass
+            return jsonify({'error': str(e)}), 500
+        Settings.clear_cache()
+        
+        # Reload configuration in current app only if it is affected
+        changed = set(updated) & _APP_CONFIG_KEYS
+        if changed:
+            try:
+                Config.init_app(current_app)
+                refresh_services()
+            except Exception as e:
+                current_app.logger.error("Error reloading configuration: %s", e)
     
     return jsonify({
         'message': f'Updated {len(updated)} settings',
@@ -135,31 +168,26 @@ def reload_settings():
     Reload settings from database into application config
     Useful after updating settings
     """
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user_id = current_user_id()
     
-    if not user or not user.is_admin():
+    if not jwt_is_admin():
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
-        current_app.config.init_app(current_app)
+        Config.init_app(current_app)
         
-        # Also update OME client with new settings
-        from services import OMEClient
-        current_app.ome_client = OMEClient(
-            current_app.config['OME_API_URL'],
-            current_app.config['OME_API_ACCESS_TOKEN']
-        )
+        # Also update OME client and config manager if their settings changed
+        refresh_services()
         
         # Log action
-        AuditLog.log_action(
-            user_id=user.id,
+        audit_queue.enqueue(dict(
+            user_id=user_id,
             action=AuditLog.ACTION_UPDATE,
             resource_type='settings',
             description='Reloaded application settings',
             ip_address=request.remote_addr,
             user_agent=request.headers.get('User-Agent')
-        )
+        ))
         
         return jsonify({'message': 'Settings reloaded successfully'}), 200
     except Exception as e:
@@ -3,10 +3,11 @@ Streams API Blueprint
 Manages and monitors streams
 """
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 
-from models import User
+from services import ome_cache
 from services.ome_client import OMEAPIException
+from services.current_user import jwt_has_permission
 
 streams_bp = Blueprint('streams', __name__)
 
@@ -16,7 +17,7 @@ streams_bp = Blueprint('streams', __name__)
 def list_streams(vhost_name, app_name):
     """List all streams in an application"""
     try:
-        streams = current_app.ome_client.list_streams(vhost_name, app_name)
+        streams = ome_cache.cached_list_streams(vhost_name, app_name)
         return jsonify(streams), 200
     except OMEAPIException as e:
         return jsonify({'error': str(e)}), 500
@@ -48,17 +49,15 @@ def get_stream_stats(vhost_name, app_name, stream_name):
 @jwt_required()
 def delete_stream(vhost_name, app_name, stream_name):
     """Delete/stop a stream"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user or not user.has_permission('write'):
+    if not jwt_has_permission('write'):
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
         success = current_app.ome_client.delete_stream(vhost_name, app_name, stream_name)
         
         if success:
-            return jsonify({'message': 'Stream deleted'}), 200
+            ome_cache.invalidate_stream(vhost_name, app_name)
+            return '', 204
         else:
             return jsonify({'error': 'Failed to delete stream'}), 500
             
@@ -3,10 +3,12 @@ VirtualHosts API Blueprint
 Manages OvenMediaEngine Virtual Hosts
 """
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 
-from models import User, AuditLog
+from models import AuditLog
 from services.ome_client import OMEAPIException
+from services import audit_queue, ome_cache
+from services.current_user import current_user_id, jwt_has_permission
 
 virtualhosts_bp = Blueprint('virtualhosts', __name__)
 
@@ -16,7 +18,7 @@ virtualhosts_bp = Blueprint('virtualhosts', __name__)
 def list_vhosts():
     """List all virtual hosts"""
     try:
-        vhosts = current_app.ome_client.list_vhosts()
+        vhosts = ome_cache.cached_list_vhosts()
         return jsonify(vhosts), 200
     except OMEAPIException as e:
         return jsonify({'error': str(e)}), 500
@@ -27,7 +29,7 @@ def list_vhosts():
 def get_vhost(vhost_name):
     """Get details of a specific virtual host"""
     try:
-        vhost = current_app.ome_client.get_vhost(vhost_name)
+        vhost = ome_cache.cached_get_vhost(vhost_name)
         return jsonify(vhost), 200
     except OMEAPIException as e:
         return jsonify({'error': str(e)}), 404
@@ -45,10 +47,9 @@ def create_vhost():
             "host": {...}
         }
     """
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user_id = current_user_id()
     
-    if not user or not user.has_permission('write'):
+    if not jwt_has_permission('write'):
         return jsonify({'error': 'Unauthorized'}), 403
     
     data = request.get_json()
@@ -57,17 +58,18 @@ def create_vhost():
     
     try:
         result = current_app.ome_client.create_vhost(data)
+        ome_cache.invalidate_vhost(data.get('name'))
         
         # Log action
-        AuditLog.log_action(
-            user_id=user.id,
+        audit_queue.enqueue(dict(
+            user_id=user_id,
             action=AuditLog.ACTION_CREATE,
             resource_type='virtualhost',
             resource_id=data.get('name'),
             description=f"Created virtual host: {data.get('name')}",
             ip_address=request.remote_addr,
             user_agent=request.headers.get('User-Agent')
-        )
+        ))
         
         return jsonify(result), 201
         
@@ -79,10 +81,9 @@ def create_vhost():
 @jwt_required()
 def update_vhost(vhost_name):
     """Update an existing virtual host"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user_id = current_user_id()
     
-    if not user or not user.has_permission('write'):
+    if not jwt_has_permission('write'):
         return jsonify({'error': 'Unauthorized'}), 403
     
     data = request.get_json()
@@ -91,17 +92,18 @@ def update_vhost(vhost_name):
     
     try:
         result = current_app.ome_client.update_vhost(vhost_name, data)
+        ome_cache.invalidate_vhost(vhost_name)
         
         # Log action
-        AuditLog.log_action(
-            user_id=user.id,
+        audit_queue.enqueue(dict(
+            user_id=user_id,
             action=AuditLog.ACTION_UPDATE,
             resource_type='virtualhost',
             resource_id=vhost_name,
             description=f"Updated virtual host: {vhost_name}",
             ip_address=request.remote_addr,
             user_agent=request.headers.get('User-Agent')
-        )
+        ))
         
         return jsonify(result), 200
         
@@ -113,28 +115,29 @@ def update_vhost(vhost_name):
 @jwt_required()
 def delete_vhost(vhost_name):
     """Delete a virtual host"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user_id = current_user_id()
     
-    if not user or not user.has_permission('delete'):
+    if not jwt_has_permission('delete'):
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
         success = current_app.ome_client.delete_vhost(vhost_name)
         
         if success:
+            ome_cache.invalidate_vhost(vhost_name)
+            
             # Log action
-            AuditLog.log_action(
-                user_id=user.id,
+            audit_queue.enqueue(dict(
+                user_id=user_id,
                 action=AuditLog.ACTION_DELETE,
                 resource_type='virtualhost',
                 resource_id=vhost_name,
                 description=f"Deleted virtual host: {vhost_name}",
                 ip_address=request.remote_addr,
                 user_agent=request.headers.get('User-Agent')
-            )
+            ))
             
-            return jsonify({'message': 'Virtual host deleted'}), 200
+            return '', 204
         else:
             return jsonify({'error': 'Failed to delete virtual host'}), 500
             
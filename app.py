@@ -2,26 +2,50 @@
 Main Flask application entry point
 OvenMediaEngine Web UI
 """
-from flask import Flask, render_template, jsonify
+from flask import Flask, current_app, render_template, jsonify, make_response, request
+from flask.cli import with_appcontext
 from flask_login import LoginManager
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_migrate import Migrate
+import atexit
+import click
+import importlib
 import logging
+import logging.handlers
 import os
+import queue
 
 from config import config
-from models import db, User
-from services import OMEClient
-
-# Import blueprints
-from api.auth import auth_bp
-from api.server import server_bp
-from api.virtualhosts import virtualhosts_bp
-from api.applications import applications_bp
-from api.streams import streams_bp
-from api.logs import logs_bp
-from api.settings import settings_bp
+from models import db, User, AuditLog, ConfigurationSnapshot
+from services import OMEClient, ConfigManager, audit_queue
+from services.json_provider import ORJSONProvider
+
+# API blueprints as (module in api/, URL prefix); each module defines <name>_bp
+BLUEPRINTS = [
+    ('auth', '/api/auth'),
+    ('server', '/api/server'),
+    ('virtualhosts', '/api/virtualhosts'),
+    ('applications', '/api/applications'),
+    ('streams', '/api/streams'),
+    ('logs', '/api/logs'),
+    ('settings', '/api/settings'),
+]
+
+# Seconds browsers may reuse a rendered page without asking again
+PAGE_MAX_AGE = 300
+
+# HTML pages as (URL, endpoint, template)
+PAGES = [
+    ('/', 'index', 'index.html'),                           # Main dashboard
+    ('/login', 'login', 'login.html'),                      # Login page
+    ('/server', 'server_config', 'server_config.html'),     # Server configuration
+    ('/virtualhosts', 'virtualhosts', 'virtualhosts.html'), # Virtual hosts management
+    ('/applications', 'applications', 'applications.html'), # Applications management
+    ('/transcoding', 'transcoding', 'transcoding.html'),    # Transcoding configuration
+    ('/monitoring', 'monitoring', 'monitoring.html'),       # Monitoring and logs
+    ('/settings', 'app_settings', 'settings.html'),         # Application settings
+]
 
 def create_app(config_name=None):
     """Application factory pattern"""
@@ -31,9 +55,16 @@ def create_app(config_name=None):
     
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    app.json = ORJSONProvider(app)
     
-    # Store config class for later reinitialization
-    app.config.init_app = config[config_name].init_app
+    # Match routes with or without a trailing slash instead of redirecting;
+    # must be set before any route is registered
+    app.url_map.strict_slashes = False
+    
+    # Templates only need to be re-checked on disk while developing
+    if not app.debug:
+        app.config['TEMPLATES_AUTO_RELOAD'] = False
+        app.jinja_env.auto_reload = False
     
     # Initialize extensions
     db.init_app(app)
@@ -46,76 +77,90 @@ def create_app(config_name=None):
     # Configure logging
     setup_logging(app)
     
-    # Register blueprints
-    app.register_blueprint(auth_bp, url_prefix='/api/auth')
-    app.register_blueprint(server_bp, url_prefix='/api/server')
-    app.register_blueprint(virtualhosts_bp, url_prefix='/api/virtualhosts')
-    app.register_blueprint(applications_bp, url_prefix='/api/applications')
-    app.register_blueprint(streams_bp, url_prefix='/api/streams')
-    app.register_blueprint(logs_bp, url_prefix='/api/logs')
-    app.register_blueprint(settings_bp, url_prefix='/api/settings')
+    # Start background audit log writer
+    audit_queue.init_app(app)
+    
+    # Register blueprints, importing the API modules only when an app is built
+    for name, url_prefix in BLUEPRINTS:
+        module = importlib.import_module(f'api.{name}')
+        app.register_blueprint(getattr(module, f'{name}_bp'), url_prefix=url_prefix)
     
     # Initialize settings in a temporary context
     with app.app_context():
         try:
-            # Initialize settings from database  
-            config[config_name].init_app(app)
-            
-            # Initialize OME client with settings from DB
-            app.ome_client = OMEClient(
-                app.config.get('OME_API_URL', 'http://localhost:8081'),
-                app.config.get('OME_API_ACCESS_TOKEN', '')
-            )
+            # Open the first pooled connection now rather than on the first request
+            db.engine.connect().close()
+        except Exception as e:
+            app.logger.warning("Database not reachable at startup: %s", e)
+        
+        # Initialize settings from database, falls back to environment variables
+        if config[config_name].init_app(app):
             app.logger.info("Application initialized with database settings")
-        except:
-            # If DB not ready, use defaults
-            app.ome_client = OMEClient('http://localhost:8081', '')
+        else:
+            app.logger.warning("Database settings unavailable, using environment defaults")
+    
+    # Shared OME client; its session keeps pooled keep-alive connections
+    # for every request this worker serves
+    app.ome_client = OMEClient(
+        app.config.get('OME_API_URL', 'http://localhost:8081'),
+        app.config.get('OME_API_ACCESS_TOKEN', '')
+    )
+    
+    # Shared Server.xml manager
+    app.config_manager = ConfigManager(
+        xml_path=app.config.get('OME_SERVER_XML_PATH', '/usr/share/ovenmediaengine/conf/Server.xml'),
+        ome_client=app.ome_client
+    )
+    
+    # CLI commands
+    app.cli.add_command(init_db_cli_command)
+    app.cli.add_command(purge_history_command)
     
     # User loader for Flask-Login
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
-    
-    # Main routes
-    @app.route('/')
-    def index():
-        """Main dashboard"""
-        return render_template('index.html')
-    
-    @app.route('/login')
-    def login():
-        """Login page"""
-        return render_template('login.html')
-    
-    @app.route('/server')
-    def server_config():
-        """Server configuration page"""
-        return render_template('server_config.html')
-    
-    @app.route('/virtualhosts')
-    def virtualhosts():
-        """Virtual hosts management page"""
-        return render_template('virtualhosts.html')
-    
-    @app.route('/applications')
-    def applications():
-        """Applications management page"""
-        return render_template('applications.html')
-    
-    @app.route('/transcoding')
-    def transcoding():
-        """Transcoding configuration page"""
-        return render_template('transcoding.html')
-    
-    @app.route('/monitoring')
-    def monitoring():
-        """Monitoring and logs page"""
-        return render_template('monitoring.html')
-    
-    @app.route('/settings')
-    def app_settings():
-        """Application settings page"""
-        return render_template('settings.html')
+        return db.session.get(User, int(user_id))
+    
+    # Main routes; the pages take no per-request context, so outside debug mode
+    # each is rendered once, in its first request, and then served from memory
+    rendered_pages = {}
+    
+    def page_view(template):
+        def view():
+            key = (template, request.script_root, request.path)
+            html = rendered_pages.get(key)
+            if html is None:
+                html = render_template(template)
+                if not app.debug:
+                    rendered_pages[key] = html
+            
+            response = make_response(html)
+            if not app.debug:
+                # Same for every user; page data comes from the API
+                response.cache_control.public = True
+                response.cache_control.max_age = PAGE_MAX_AGE
+                response.add_etag()
+                response = response.make_conditional(request)
+            return response
+        return view
+    
+    for url, endpoint, template in PAGES:
+        app.add_url_rule(url, endpoint, page_view(template))
+    
+    @app.after_request
+    def add_api_etag(response):
+        """Let clients revalidate unchanged API GET responses with an ETag"""
+        if (request.method == 'GET' and request.path.startswith('/api/')
+                and response.status_code == 200 and not response.is_streamed
+                and 'Cache-Control' not in response.headers):
+            # Responses depend on the caller's token, so only the client may
+            # keep them, and it must revalidate before each use
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            response.vary.add('Authorization')
+            response.add_etag()
+            response = response.make_conditional(request)
+        return response
     
     # Error handlers
     @app.errorhandler(404)
@@ -127,7 +172,7 @@ def create_app(config_name=None):
     @app.errorhandler(500)
     def internal_error(error):
         db.session.rollback()
-        app.logger.error(f'Internal error: {error}')
+        app.logger.error('Internal error: %s', error)
         if app.config['DEBUG']:
             return jsonify({'error': 'Internal server error'}), 500
         return render_template('500.html'), 500
@@ -146,18 +191,25 @@ def setup_logging(app):
         # Get log level from config with fallback
         log_level = getattr(logging, app.config.get('LOG_LEVEL', 'INFO'))
         
-        # File handler
+        # File handler, the file is opened on the first record
         file_handler = logging.handlers.RotatingFileHandler(
             app.config.get('LOG_FILE', 'logs/app.log'),
             maxBytes=10240000,  # 10MB
-            backupCount=10
+            backupCount=10,
+            delay=True
         )
         file_handler.setLevel(log_level)
         file_handler.setFormatter(logging.Formatter(
             '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
         ))
         
-        app.logger.addHandler(file_handler)
+        # Requests only enqueue records; a listener thread does the disk writes
+        log_queue = queue.Queue(-1)
+        listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        
+        app.logger.addHandler(logging.handlers.QueueHandler(log_queue))
         app.logger.setLevel(log_level)
         app.logger.info('OvenMediaEngine Web UI startup')
 
@@ -167,7 +219,27 @@ def setup_logging(app):
 def init_db_command(app):
     """Initialize database with default data"""
     with app.app_context():
-        db.create_all()
+        # Reflect the schema once and only create what is missing
+        inspector = db.inspect(db.engine)
+        existing_tables = set(inspector.get_table_names())
+        if not existing_tables.issuperset(db.metadata.tables):
+            db.create_all()
+        
+        # create_all skips tables that already exist, so add indexes
+        # introduced after a table was first created
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(db.engine)
+        
+        # Snapshot payloads used to be stored as plain text
+        if ConfigurationSnapshot.__tablename__ in existing_tables:
+            compressed = ConfigurationSnapshot.upgrade_payload_storage()
+            if compressed:
+                app.logger.info("Compressed %d configuration snapshots", compressed)
         
         # Create default admin user if doesn't exist
         admin = User.query.filter_by(username='admin').first()
@@ -183,12 +255,29 @@ def init_db_command(app):
             app.logger.info("Default admin user created")
 
 
+@click.command('init-db')
+@with_appcontext
+def init_db_cli_command():
+    """Create missing tables and indexes, migrate old data and add the admin user"""
+    init_db_command(current_app._get_current_object())
+    click.echo("Database initialized")
+
+
+@click.command('purge-history')
+@click.option('--days', default=90, show_default=True, help='Keep entries newer than this many days')
+@with_appcontext
+def purge_history_command(days):
+    """Delete old audit log entries and configuration snapshots"""
+    logs = AuditLog.purge_older_than(days)
+    snapshots = ConfigurationSnapshot.purge_older_than(days)
+    click.echo(f"Deleted {logs} audit log entries and {snapshots} configuration snapshots")
+
+
 if __name__ == '__main__':
     app = create_app()
     
     # Initialize database on first run
-    with app.app_context():
-        db.create_all()
-        init_db_command(app)
+    init_db_command(app)
     
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Development server only; use gunicorn.conf.py in production
+    app.run(host='0.0.0.0', port=5000, debug=app.config.get('DEBUG', False))
@@ -0,0 +1,34 @@
+"""
+Gunicorn configuration for OvenMediaEngine Web UI
+Usage: gunicorn -c gunicorn.conf.py 'app:create_app()'
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Most API requests wait on the OvenMediaEngine REST API, so each worker
+# serves them from gevent greenlets; the gevent worker monkey-patches the
+# standard library (sockets, threading, queue) before the app is loaded.
+# GUNICORN_WORKER_CLASS=gthread falls back to a thread pool per worker.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+timeout = 60
+
+# Recycle workers periodically, staggered so they do not restart together
+max_requests = 500
+max_requests_jitter = 200
+
+
+def post_fork(server, worker):
+    """Make psycopg2 cooperative under gevent when Postgres is used"""
+    if worker_class != 'gevent' or not os.environ.get('DATABASE_URL', '').startswith('postgres'):
+        return
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        server.log.warning("psycogreen not installed, Postgres queries will block the worker")
+        return
+    patch_psycopg()
@@ -1,8 +1,9 @@
 """
 Audit log model for tracking all changes
 """
-from datetime import datetime
+from datetime import datetime, timedelta
 from . import db
+from .types import utcnow
 
 
 class AuditLog(db.Model):
@@ -10,6 +11,13 @@ class AuditLog(db.Model):
     
     __tablename__ = 'audit_logs'
     
+    # The audit log view filters by user or resource type and pages newest first;
+    # these also cover plain user_id lookups
+    __table_args__ = (
+        db.Index('ix_audit_user_ts', 'user_id', 'timestamp'),
+        db.Index('ix_audit_resource_ts', 'resource_type', 'timestamp'),
+    )
+    
     # Action types
     ACTION_LOGIN = 'login'
     ACTION_LOGOUT = 'logout'
@@ -29,7 +37,13 @@ class AuditLog(db.Model):
     user_agent = db.Column(db.String(500))
     status = db.Column(db.String(20), default='success')  # success, failure
     error_message = db.Column(db.Text)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    timestamp = db.Column(db.DateTime, default=utcnow(), nullable=False, index=True)
+    
+    # to_dict keys, for list endpoints that serialize rows in bulk
+    JSON_FIELDS = (
+        'id', 'user_id', 'action', 'resource_type', 'resource_id', 'description',
+        'ip_address', 'status', 'error_message', 'timestamp'
+    )
     
     def __repr__(self):
         return f'<AuditLog {self.action} by user {self.user_id}>'
@@ -38,8 +52,11 @@ class AuditLog(db.Model):
     def log_action(cls, user_id, action, resource_type, resource_id=None, 
                    description=None, ip_address=None, user_agent=None, 
                    status='success', error_message=None):
-        """Helper method to create audit log entries"""
-        log = cls(
+        """Helper method to queue audit log entries for the background writer"""
+        # Imported here to avoid circular import (services imports models)
+        from services import audit_queue
+        
+        audit_queue.enqueue(dict(
             user_id=user_id,
             action=action,
             resource_type=resource_type,
@@ -49,10 +66,15 @@ class AuditLog(db.Model):
             user_agent=user_agent,
             status=status,
             error_message=error_message
-        )
-        db.session.add(log)
+        ))
+    
+    @classmethod
+    def purge_older_than(cls, days):
+        """Delete entries older than the given number of days, returns how many"""
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        deleted = cls.query.filter(cls.timestamp < cutoff).delete(synchronize_session=False)
         db.session.commit()
-        return log
+        return deleted
     
     def to_dict(self):
         """Convert audit log to dictionary"""
@@ -1,8 +1,9 @@
 """
 Configuration snapshot model for versioning
 """
-from datetime import datetime
+from datetime import datetime, timedelta
 from . import db
+from .types import CompressedText, utcnow
 
 
 class ConfigurationSnapshot(db.Model):
@@ -14,30 +15,102 @@ class ConfigurationSnapshot(db.Model):
     version = db.Column(db.Integer, nullable=False, index=True)
     description = db.Column(db.String(500))
     configuration_type = db.Column(db.String(50), nullable=False, default='server_xml')  # server_xml, vhost, application
-    configuration_data = db.Column(db.Text, nullable=False)  # XML or JSON string
+    # XML or JSON string stored compressed, deferred so metadata queries never load the payload
+    configuration_data = db.deferred(db.Column(CompressedText, nullable=False))
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=utcnow(), nullable=False, index=True)
     is_active = db.Column(db.Boolean, default=False)  # Only one active snapshot at a time
     
+    # to_dict keys, for list endpoints that serialize rows in bulk
+    JSON_FIELDS = ('id', 'version', 'description', 'configuration_type', 'user_id', 'created_at', 'is_active')
+    
     def __repr__(self):
         return f'<ConfigurationSnapshot v{self.version}>'
     
     @classmethod
     def get_latest_version(cls):
         """Get the latest version number"""
-        latest = cls.query.order_by(cls.version.desc()).first()
-        return latest.version if latest else 0
+        # MAX over the indexed column is answered from the index alone,
+        # without loading and mapping a snapshot row
+        return db.session.query(db.func.max(cls.version)).scalar() or 0
     
     @classmethod
     def get_active(cls):
         """Get the currently active configuration"""
         return cls.query.filter_by(is_active=True).first()
     
+    @classmethod
+    def purge_older_than(cls, days):
+        """
+        Delete snapshots older than the given number of days, returns how many
+        
+        The active snapshot and the latest version are always kept, the
+        latter so that version numbers keep increasing.
+        """
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        deleted = cls.query.filter(
+            cls.created_at < cutoff,
+            cls.is_active.isnot(True),
+            cls.version < cls.get_latest_version()
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+    
+    @classmethod
+    def upgrade_payload_storage(cls):
+        """
+        Migrate configuration_data from its former TEXT type to compressed binary
+        
+        PostgreSQL and MySQL columns are converted in place; SQLite keeps
+        the declared type but stores each value with its own storage class.
+        Rows still holding plain text are then rewritten compressed.
+        
+        Returns:
+            Number of rows compressed
+        """
+        table = cls.__table__
+        column = next(
+            c for c in db.inspect(db.engine).get_columns(table.name)
+            if c['name'] == 'configuration_data'
+        )
+        dialect = db.engine.dialect.name
+        is_text = isinstance(column['type'], db.String)
+        
+        if dialect == 'sqlite':
+            legacy = "SELECT id, configuration_data FROM configuration_snapshots WHERE typeof(configuration_data) = 'text'"
+        elif not is_text:
+            return 0
+        elif dialect == 'postgresql':
+            alter = ("ALTER TABLE configuration_snapshots ALTER COLUMN configuration_data "
+                     "TYPE BYTEA USING convert_to(configuration_data, 'UTF8')")
+        elif dialect in ('mysql', 'mariadb'):
+            alter = "ALTER TABLE configuration_snapshots MODIFY configuration_data LONGBLOB NOT NULL"
+        else:
+            raise NotImplementedError(f"No configuration_data migration for {dialect}")
+        
+        with db.engine.begin() as conn:
+            if dialect != 'sqlite':
+                conn.execute(db.text(alter))
+                # Every row held text before the conversion
+                legacy = "SELECT id, configuration_data FROM configuration_snapshots"
+            rows = conn.execute(db.text(legacy)).all()
+            for row_id, data in rows:
+                text = data if isinstance(data, str) else bytes(data).decode('utf-8')
+                # Bound through CompressedText, which compresses the value
+                conn.execute(table.update().where(table.c.id == row_id).values(configuration_data=text))
+        return len(rows)
+    
     def activate(self):
         """Set this snapshot as active and deactivate others"""
-        # Deactivate all other snapshots
-        ConfigurationSnapshot.query.filter_by(is_active=True).update({'is_active': False})
-        self.is_active = True
+        # One statement flips both sides, so there is never a moment with
+        # zero or two active snapshots
+        cls = ConfigurationSnapshot
+        db.session.execute(
+            db.update(cls)
+            .where(db.or_(cls.is_active.is_(True), cls.id == self.id))
+            .values(is_active=db.case((cls.id == self.id, True), else_=False))
+            .execution_options(synchronize_session=False)
+        )
         db.session.commit()
     
     def to_dict(self):
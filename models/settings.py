@@ -2,8 +2,10 @@
 Settings model for database-based configuration
 All application settings stored in database instead of environment variables
 """
-from datetime import datetime
+from flask import current_app
+from sqlalchemy.dialects import postgresql, sqlite
 from . import db
+from .types import utcnow
 
 
 class Settings(db.Model):
@@ -23,17 +25,31 @@ class Settings(db.Model):
     category = db.Column(db.String(50), nullable=False)
     description = db.Column(db.String(500))
     is_secret = db.Column(db.Boolean, default=False)  # For sensitive data like tokens
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=utcnow(), onupdate=utcnow())
     updated_by = db.Column(db.Integer, db.ForeignKey('users.id'))
     
     def __repr__(self):
         return f'<Setting {self.key}>'
     
+    @classmethod
+    def load_cache(cls):
+        """Load all setting values into the application's cache with a single query"""
+        cache = dict(db.session.query(cls.key, cls.value).all())
+        current_app.extensions['settings_cache'] = cache
+        return cache
+    
+    @classmethod
+    def clear_cache(cls):
+        """Drop cached values so the next lookup reads the database again"""
+        current_app.extensions.pop('settings_cache', None)
+    
     @classmethod
     def get(cls, key, default=None):
         """Get a setting value by key"""
-        setting = cls.query.filter_by(key=key).first()
-        return setting.value if setting else default
+        cache = current_app.extensions.get('settings_cache')
+        if cache is None:
+            cache = cls.load_cache()
+        return cache.get(key, default)
     
     @classmethod
     def set(cls, key, value, category=CATEGORY_GENERAL, description=None, is_secret=False, user_id=None):
@@ -42,7 +58,6 @@ class Settings(db.Model):
         
         if setting:
             setting.value = value
-            setting.updated_at = datetime.utcnow()
             setting.updated_by = user_id
         else:
             setting = cls(
@@ -56,6 +71,10 @@ class Settings(db.Model):
             db.session.add(setting)
         
         db.session.commit()
+        
+        cache = current_app.extensions.get('settings_cache')
+        if cache is not None:
+            cache[key] = value
         return setting
     
     @classmethod
@@ -66,8 +85,7 @@ class Settings(db.Model):
     @classmethod
     def get_all_as_dict(cls):
         """Get all settings as dictionary"""
-        settings = cls.query.all()
-        return {s.key: s.value for s in settings}
+        return dict(db.session.query(cls.key, cls.value).all())
     
     @classmethod
     def initialize_defaults(cls):
@@ -90,19 +108,29 @@ class Settings(db.Model):
             ('session_timeout', '3600', cls.CATEGORY_SECURITY, 'Session timeout in seconds', False),
         ]
         
-        for key, value, category, description, is_secret in defaults:
-            existing = cls.query.filter_by(key=key).first()
-            if not existing:
-                setting = cls(
-                    key=key,
-                    value=value,
-                    category=category,
-                    description=description,
-                    is_secret=is_secret
-                )
-                db.session.add(setting)
+        rows = [
+            dict(key=key, value=value, category=category, description=description, is_secret=is_secret)
+            for key, value, category, description, is_secret in defaults
+        ]
         
-        db.session.commit()
+        # Insert all missing defaults in one statement; existing keys are left
+        # untouched, also when several workers start at the same time
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'sqlite':
+            stmt = sqlite.insert(cls).values(rows).on_conflict_do_nothing(index_elements=['key'])
+        elif dialect == 'postgresql':
+            stmt = postgresql.insert(cls).values(rows).on_conflict_do_nothing(index_elements=['key'])
+        elif dialect in ('mysql', 'mariadb'):
+            stmt = db.insert(cls).values(rows).prefix_with('IGNORE')
+        else:
+            existing = {key for (key,) in db.session.query(cls.key)}
+            rows = [row for row in rows if row['key'] not in existing]
+            stmt = db.insert(cls).values(rows) if rows else None
+        
+        if stmt is not None:
+            db.session.execute(stmt)
+            db.session.commit()
+        cls.load_cache()
     
     def to_dict(self, include_secret=False):
         """Convert setting to dictionary"""
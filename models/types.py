@@ -0,0 +1,83 @@
+"""
+Custom column types
+Column types and SQL expressions shared by the models
+"""
+import zlib
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import DateTime, LargeBinary, TypeDecorator
+
+
+class CompressedText(TypeDecorator):
+    """Text stored zlib-compressed in a binary column"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, level=6, *args, **kwargs):
+        """
+        Initialize the type
+
+        Args:
+            level: zlib compression level (1 fastest, 9 smallest)
+        """
+        super().__init__(*args, **kwargs)
+        self.level = level
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return zlib.compress(value.encode('utf-8'), self.level)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        # Rows written before compression was introduced come back as text,
+        # or as plain bytes once their column was converted to binary
+        if isinstance(value, str):
+            return value
+        try:
+            return zlib.decompress(value).decode('utf-8')
+        except zlib.error:
+            return bytes(value).decode('utf-8')
+
+
+class utcnow(FunctionElement):
+    """
+    Current UTC time, evaluated by the database
+
+    Used as a SQL expression column default, so it is rendered into each
+    INSERT and needs no DEFAULT in the existing schema.
+    """
+
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    return 'CURRENT_TIMESTAMP'
+
+
+@compiles(utcnow, 'postgresql')
+def _utcnow_postgresql(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
+@compiles(utcnow, 'sqlite')
+def _utcnow_sqlite(element, compiler, **kw):
+    # Same text format, with microseconds, as the bound Python datetimes, so
+    # string comparisons against stored values stay correct
+    return "STRFTIME('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
+@compiles(utcnow, 'mysql')
+@compiles(utcnow, 'mariadb')
+def _utcnow_mysql(element, compiler, **kw):
+    return 'UTC_TIMESTAMP(6)'
+
+
+@compiles(utcnow, 'mssql')
+def _utcnow_mssql(element, compiler, **kw):
+    return 'SYSUTCDATETIME()'
@@ -1,12 +1,22 @@
 """
 User model for authentication and authorization
 """
-from datetime import datetime
+import functools
+
 from flask_login import UserMixin
 from . import db
+from .types import utcnow
 import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from typing import Optional
 
+# argon2id tuned to roughly 50 ms per hash
+_password_hasher = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=1)
+
+# Prefix of hashes created by bcrypt before the switch to argon2
+_BCRYPT_PREFIX = '$2'
+
 
 class User(UserMixin, db.Model):
     """User model with role-based access control"""
@@ -20,37 +30,56 @@ class User(UserMixin, db.Model):
     
     ROLES = [ROLE_ADMIN, ROLE_OPERATOR, ROLE_VIEWER]
     
+    # Permission bits
+    PERM_READ = 1
+    PERM_WRITE = 2
+    PERM_DELETE = 4
+    PERM_MANAGE_USERS = 8
+    
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False, index=True)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(20), nullable=False, default=ROLE_VIEWER)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=utcnow(), nullable=False)
     last_login = db.Column(db.DateTime)
     
     # Relationships
     audit_logs = db.relationship('AuditLog', backref='user', lazy='dynamic')
     
+    # to_dict keys, for list endpoints that serialize rows in bulk
+    JSON_FIELDS = ('id', 'username', 'email', 'role', 'is_active', 'created_at', 'last_login')
+    
     def __repr__(self):
         return f'<User {self.username}>'
     
     def set_password(self, password):
         """Hash and set user password"""
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        self.password_hash = _password_hasher.hash(password)
     
     def check_password(self, password):
-        """Check if provided password matches hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        """Check if provided password matches hash (argon2, or legacy bcrypt)"""
+        if self.password_hash.startswith(_BCRYPT_PREFIX):
+            return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        try:
+            return _password_hasher.verify(self.password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    
+    def password_needs_rehash(self):
+        """Check if the hash is legacy bcrypt or uses outdated argon2 parameters"""
+        if self.password_hash.startswith(_BCRYPT_PREFIX):
+            return True
+        return _password_hasher.check_needs_rehash(self.password_hash)
+    
+    def get_permissions(self):
+        """Get list of permissions granted by the user's role"""
+        return list(_role_permissions(self.role))
     
     def has_permission(self, permission):
         """Check if user has specific permission based on role"""
-        permissions = {
-            self.ROLE_ADMIN: ['read', 'write', 'delete', 'manage_users'],
-            self.ROLE_OPERATOR: ['read', 'write'],
-            self.ROLE_VIEWER: ['read']
-        }
-        return permission in permissions.get(self.role, [])
+        return bool(_ROLE_MASK.get(self.role, 0) & _PERM_BY_NAME.get(permission, 0))
     
     def is_admin(self):
         """Check if user is admin"""
@@ -58,7 +87,24 @@ class User(UserMixin, db.Model):
     
     def is_operator(self):
         """Check if user is operator or admin"""
-        return self.role in [self.ROLE_ADMIN, self.ROLE_OPERATOR]
+        return bool(_ROLE_MASK.get(self.role, 0) & self.PERM_WRITE)
+    
+    def _isoformat(self, name):
+        """
+        ISO 8601 string of a datetime column, memoized per instance
+        
+        The memo is keyed on the current value rather than kept up to date by
+        @validates hooks, since those do not fire for values loaded or
+        refreshed from the database (e.g. the created_at server default).
+        """
+        value = getattr(self, name)
+        if value is None:
+            return None
+        memo = self.__dict__.setdefault('_iso_memo', {})
+        cached = memo.get(name)
+        if cached is None or cached[0] is not value:
+            cached = memo[name] = (value, value.isoformat())
+        return cached[1]
     
     def to_dict(self):
         """Convert user to dictionary (excluding password)"""
@@ -68,6 +114,29 @@ class User(UserMixin, db.Model):
             'email': self.email,
             'role': self.role,
             'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'last_login': self.last_login.isoformat() if self.last_login else None
+            'created_at': self._isoformat('created_at'),
+            'last_login': self._isoformat('last_login')
         }
+
+
+# Permission names and the bit each one maps to
+_PERM_BY_NAME = {
+    'read': User.PERM_READ,
+    'write': User.PERM_WRITE,
+    'delete': User.PERM_DELETE,
+    'manage_users': User.PERM_MANAGE_USERS
+}
+
+# Permission bits granted by each role
+_ROLE_MASK = {
+    User.ROLE_ADMIN: User.PERM_READ | User.PERM_WRITE | User.PERM_DELETE | User.PERM_MANAGE_USERS,
+    User.ROLE_OPERATOR: User.PERM_READ | User.PERM_WRITE,
+    User.ROLE_VIEWER: User.PERM_READ
+}
+
+
+@functools.lru_cache(maxsize=32)
+def _role_permissions(role):
+    """Sorted permission names of a role, derived from its mask once per role"""
+    mask = _ROLE_MASK.get(role, 0)
+    return tuple(sorted(name for name, bit in _PERM_BY_NAME.items() if mask & bit))
@@ -0,0 +1,158 @@
+"""
+Audit Queue
+Background writer that persists audit log entries off the request path
+"""
+import atexit
+import queue
+import threading
+import time
+import logging
+from datetime import datetime
+from typing import Dict, Any
+
+from flask import current_app
+
+from models import db, AuditLog
+from .ome_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Audit log totals per filter combination, filled by the logs API and
+# dropped whenever this process commits new entries
+totals = TTLCache(maxsize=256, ttl=30)
+
+
+class AuditQueue:
+    """Bounded queue of audit entries drained by a daemon writer thread"""
+
+    def __init__(self, app, maxsize: int = 10000, batch_size: int = 100, flush_interval: float = 0.5,
+                 retry_delays: tuple = (0.1, 0.5, 2.0)):
+        """
+        Initialize the queue and start its writer thread
+
+        Args:
+            app: Flask application used for the writer's app context
+            maxsize: Maximum number of pending entries
+            batch_size: Maximum number of entries persisted per commit
+            flush_interval: Maximum seconds an entry waits for its batch
+            retry_delays: Seconds to wait before each retry of a failed batch
+        """
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_delays = retry_delays
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._writer = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._writer.start()
+
+    def put(self, entry: Dict[str, Any]):
+        """
+        Queue an audit entry for writing
+
+        Args:
+            entry: AuditLog column values
+        """
+        # Stamp the entry now, not when the writer gets to it
+        entry.setdefault('timestamp', datetime.utcnow())
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            logger.warning("Audit queue full, writing entry synchronously")
+            self._write([entry])
+
+    def _run(self):
+        """Drain the queue in batches until the process exits"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self, timeout: float = 5):
+        """
+        Write all pending entries now, e.g. before the process exits
+
+        Args:
+            timeout: Maximum seconds to wait for the batch the writer thread
+                is currently persisting
+        """
+        pending = []
+        while True:
+            try:
+                pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning("Audit writer still busy, some entries may not be written")
+                    break
+                self._queue.all_tasks_done.wait(remaining)
+
+    def _write(self, batch: list):
+        """
+        Persist a batch of entries in a single transaction
+
+        Failed commits (e.g. SQLite "database is locked") are retried after
+        each of retry_delays. If the batch still fails, its entries are
+        written one at a time so that a single bad entry cannot take the
+        others with it; only entries that fail on their own are dropped,
+        and each of those is logged in full.
+        """
+        with self.app.app_context():
+            for delay in self.retry_delays + (None,):
+                if self._commit(batch):
+                    return
+                if delay is None:
+                    break
+                logger.warning("Error writing %d audit log entries, retrying in %.1fs", len(batch), delay)
+                time.sleep(delay)
+
+            if len(batch) > 1:
+                for entry in batch:
+                    if not self._commit([entry]):
+                        logger.error("Dropping audit log entry: %r", entry)
+            else:
+                logger.error("Dropping audit log entry: %r", batch[0])
+
+    def _commit(self, entries: list) -> bool:
+        """Insert and commit entries, returns False after rolling back on error"""
+        try:
+            db.session.bulk_insert_mappings(AuditLog, entries)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            logger.exception("Error writing %d audit log entries", len(entries))
+            return False
+        totals.clear()
+        return True
+
+
+def init_app(app):
+    """Attach an audit queue to the application and flush it at exit"""
+    audit_queue = app.extensions['audit_queue'] = AuditQueue(app)
+    # Gunicorn workers exit normally on SIGTERM, so this also runs on shutdown
+    atexit.register(audit_queue.flush)
+
+
+def enqueue(entry: Dict[str, Any]):
+    """Queue an audit entry on the current application's writer"""
+    current_app.extensions['audit_queue'].put(entry)
+
@@ -2,9 +2,10 @@
 Configuration Manager
 Centralized service for managing OvenMediaEngine configurations
 """
+import itertools
 import os
 import shutil
-from datetime import datetime
+import time
 from typing import Dict, Any, Optional
 from .xml_parser import XMLParser
 from .ome_client import OMEClient
@@ -12,6 +13,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Sequence number for backup names, so two saves within a second never collide
+_backup_counter = itertools.count()
+
 
 class ConfigManager:
     """Manages OvenMediaEngine configuration with versioning and rollback"""
@@ -55,19 +59,41 @@ class ConfigManager:
         try:
             # Create backup if requested
             if backup and os.path.exists(self.xml_path):
-                backup_path = f"{self.xml_path}.backup.{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                # The pid keeps names unique across worker processes
+                backup_path = f"{self.xml_path}.backup.{int(time.time())}.{os.getpid()}.{next(_backup_counter)}"
                 shutil.copy2(self.xml_path, backup_path)
-                logger.info(f"Created backup: {backup_path}")
+                logger.info("Created backup: %s", backup_path)
             
             # Write new configuration
             self.parser.write_file(config, self.xml_path, pretty=True)
-            logger.info(f"Configuration written to {self.xml_path}")
+            logger.info("Configuration written to %s", self.xml_path)
             return True
             
         except Exception as e:
-            logger.error(f"Error writing configuration: {str(e)}")
+            logger.error("Error writing configuration: %s", e)
             raise
     
+    def replace_raw_config(self, xml_string: str) -> str:
+        """
+        Replace Server.xml with raw XML content
+        
+        The new content is written to a temporary file that is renamed over
+        Server.xml, so readers never see a partially written file.
+        
+        Args:
+            xml_string: New XML configuration string
+            
+        Returns:
+            Previous XML content of the file
+        """
+        with open(self.xml_path, 'r', encoding='utf-8') as f:
+            old_xml = f.read()
+        
+        self.parser.write_string(xml_string, self.xml_path)
+        
+        logger.info("Configuration written to %s", self.xml_path)
+        return old_xml
+    
     def validate_config(self, config: Dict[str, Any]) -> tuple[bool, Optional[str]]:
         """
         Validate configuration before applying
@@ -80,7 +106,7 @@ class ConfigManager:
         """
         try:
             # Convert to XML and validate syntax
-            xml_string = self.parser.dict_to_xml(config)
+            xml_string = self.parser.dict_to_xml(config, pretty=False)
             is_valid, error = self.parser.validate_xml(xml_string)
             
             if not is_valid:
@@ -107,15 +133,17 @@ class ConfigManager:
     
     def get_server_info(self) -> Dict[str, Any]:
         """Get basic server information from config"""
-        config = self.read_config()
-        return self.parser.extract_server_info(config)
+        # Reads only the reported fields instead of building the whole config dict
+        return self.parser.extract_server_info_fast(self.xml_path)
     
     def get_virtual_hosts(self) -> list:
         """Get list of virtual hosts from config"""
         config = self.read_config()
-        vhosts = config.get('Server', {}).get('VirtualHosts', {}).get('VirtualHost', [])
+        # xmltodict returns a dict for a single VirtualHost and None for an
+        # empty <VirtualHosts/>
+        vhosts = ((config.get('Server') or {}).get('VirtualHosts') or {}).get('VirtualHost') or []
         
-        # Ensure it's a list (xmltodict returns dict for single item)
+        # Ensure it's a list
         if isinstance(vhosts, dict):
             vhosts = [vhosts]
         
@@ -138,15 +166,12 @@ class ConfigManager:
         if isinstance(vhosts, dict):
             vhosts = [vhosts]
         
-        # Find and update the vhost
-        updated = False
-        for i, vhost in enumerate(vhosts):
-            if vhost.get('Name') == vhost_name:
-                vhosts[i] = vhost_config
-                updated = True
-                break
+        # Find the vhost, stopping at the first match
+        index = next((i for i, vhost in enumerate(vhosts) if vhost.get('Name') == vhost_name), None)
         
-        if updated:
+        if index is not None:
+            vhosts[index] = vhost_config
+            
             # Update the config
             if isinstance(config['Server']['VirtualHosts']['VirtualHost'], list):
                 config['Server']['VirtualHosts']['VirtualHost'] = vhosts
@@ -168,9 +193,11 @@ class ConfigManager:
             XML string of current configuration
         """
         config = self.read_config()
-        xml_string = self.parser.dict_to_xml(config)
+        # Snapshots are only read back through restore_from_snapshot, which
+        # re-parses and pretty-prints them, so skip the indentation here
+        xml_string = self.parser.dict_to_xml(config, pretty=False)
         
-        logger.info(f"Created configuration snapshot: {description or 'No description'}")
+        logger.info("Created configuration snapshot: %s", description or 'No description')
         return xml_string
     
     def restore_from_snapshot(self, xml_string: str) -> bool:
@@ -195,7 +222,7 @@ class ConfigManager:
             return self.write_config(config, backup=True)
             
         except Exception as e:
-            logger.error(f"Error restoring snapshot: {str(e)}")
+            logger.error("Error restoring snapshot: %s", e)
             raise
     
     def test_ome_connection(self) -> tuple[bool, Optional[str]]:
@@ -0,0 +1,64 @@
+"""
+Current user helpers
+Request-scoped access to the authenticated user
+"""
+from flask import g
+from flask_jwt_extended import get_jwt, get_jwt_identity
+
+from models import db, User
+
+
+def current_user():
+    """
+    Get the user for the JWT identity of the current request
+
+    The lookup is memoized on flask.g so that handlers and helpers
+    consulting the user more than once only hit the database once.
+
+    Returns:
+        User instance or None if the user no longer exists
+    """
+    if '_current_user' not in g:
+        g._current_user = db.session.get(User, get_jwt_identity())
+    return g._current_user
+
+
+def current_user_id():
+    """Get the user id (JWT identity) of the current request"""
+    return get_jwt_identity()
+
+
+def jwt_role():
+    """
+    Get the role of the current user from the JWT claims
+
+    Falls back to the database for tokens issued without a role claim.
+    """
+    claims = get_jwt()
+    if 'role' in claims:
+        return claims['role']
+    user = current_user()
+    return user.role if user else None
+
+
+def jwt_has_permission(permission):
+    """
+    Check a permission against the JWT claims of the current request
+
+    Falls back to the database for tokens issued without a perms claim.
+    """
+    claims = get_jwt()
+    if 'perms' in claims:
+        return permission in claims['perms']
+    user = current_user()
+    return bool(user and user.has_permission(permission))
+
+
+def jwt_is_admin():
+    """Check if the current user is admin"""
+    return jwt_role() == User.ROLE_ADMIN
+
+
+def jwt_is_operator():
+    """Check if the current user is operator or admin"""
+    return jwt_role() in (User.ROLE_ADMIN, User.ROLE_OPERATOR)
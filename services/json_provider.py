@@ -0,0 +1,77 @@
+"""
+JSON Provider
+orjson-backed JSON serialization for Flask responses
+"""
+from operator import attrgetter
+from typing import Any, Iterable, List, Sequence
+
+import orjson
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that serializes with orjson
+
+    Types orjson does not handle the way Flask does (datetimes, Decimal,
+    objects with __html__) still go through Flask's default hook, so the
+    output matches the stdlib provider.
+    """
+
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def _options(self, indent: bool = False) -> int:
+        """Build orjson option flags from the provider settings"""
+        options = self._OPTIONS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """Serialize data as JSON to a string"""
+        if kwargs:
+            # json.dumps specific arguments, e.g. from the tojson filter
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode('utf-8')
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        """Deserialize data as JSON from a string or bytes"""
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        """Serialize the arguments as JSON and wrap them in a response"""
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent))
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def rows_to_dicts(rows: Iterable[Any], fields: Sequence[str]) -> List[dict]:
+    """
+    Map model rows to dicts of the given attributes
+
+    Values are left as is, so datetimes must be serialized by orjson itself
+    (json_response / rows_to_json) which writes them as ISO 8601 like
+    the models' to_dict methods.
+    """
+    get = attrgetter(*fields)
+    if len(fields) == 1:
+        return [{fields[0]: get(row)} for row in rows]
+    return [dict(zip(fields, get(row))) for row in rows]
+
+
+def rows_to_json(rows: Iterable[Any], fields: Sequence[str]) -> bytes:
+    """Serialize model rows as a JSON array of the given attributes"""
+    return orjson.dumps(rows_to_dicts(rows, fields))
+
+
+def json_response(obj: Any, status: int = 200):
+    """Build a JSON response serialized directly by orjson"""
+    return current_app.response_class(
+        orjson.dumps(obj) + b'\n', status=status, mimetype='application/json'
+    )
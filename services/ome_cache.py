@@ -0,0 +1,183 @@
+"""
+OME Response Cache
+Short-lived in-process cache for OvenMediaEngine topology calls
+"""
+import threading
+import time
+import logging
+from typing import Any, Callable, Dict, Hashable, List
+
+from flask import current_app
+
+from .ome_client import OMEAPIException
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Seconds before server stats are refreshed, and before they are too old to serve
+STATS_TTL = 2
+STATS_MAX_AGE = 30
+
+
+class TTLCache:
+    """Thread-safe mapping whose entries expire a fixed time after being stored"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3):
+        """
+        Initialize the cache
+
+        Args:
+            maxsize: Maximum number of entries kept
+            ttl: Seconds an entry stays valid
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.RLock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires, value = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """Store value under key for the cache TTL"""
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.maxsize:
+                self._evict()
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove key and return its value, or default if missing"""
+        with self._lock:
+            item = self._data.pop(key, None)
+            return default if item is None else item[1]
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def _evict(self):
+        """Drop expired entries, then the oldest one if still full"""
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._data.items() if expires <= now]:
+            del self._data[key]
+        if len(self._data) >= self.maxsize:
+            del self._data[next(iter(self._data))]
+
+
+_ttl = TTLCache(maxsize=1024, ttl=3)
+
+# Last server stats as (client, fetched_at, stats)
+_server_stats = None
+_stats_refresh = threading.Lock()
+
+
+def _cached(key: Hashable, fetch: Callable[[], Any]) -> Any:
+    """Return the cached value for key, calling fetch on a miss"""
+    value = _ttl.get(key, _MISSING)
+    if value is _MISSING:
+        value = fetch()
+        _ttl.set(key, value)
+    return value
+
+
+def cached_list_vhosts() -> List[Dict[str, Any]]:
+    """List virtual hosts through the cache"""
+    return _cached(('vhosts',), current_app.ome_client.list_vhosts)
+
+
+def cached_get_vhost(vhost_name: str) -> Dict[str, Any]:
+    """Get virtual host details through the cache"""
+    return _cached(('vhost', vhost_name), lambda: current_app.ome_client.get_vhost(vhost_name))
+
+
+def cached_list_apps(vhost_name: str) -> List[Dict[str, Any]]:
+    """List applications of a virtual host through the cache"""
+    return _cached(('apps', vhost_name), lambda: current_app.ome_client.list_apps(vhost_name))
+
+
+def cached_get_app(vhost_name: str, app_name: str) -> Dict[str, Any]:
+    """Get application details through the cache"""
+    return _cached(
+        ('app', vhost_name, app_name),
+        lambda: current_app.ome_client.get_app(vhost_name, app_name)
+    )
+
+
+def cached_list_streams(vhost_name: str, app_name: str) -> List[Dict[str, Any]]:
+    """List streams of an application through the cache"""
+    return _cached(
+        ('streams', vhost_name, app_name),
+        lambda: current_app.ome_client.list_streams(vhost_name, app_name)
+    )
+
+
+def cached_server_stats() -> Dict[str, Any]:
+    """
+    Get server stats, refreshing them in the background once stale
+
+    Stats older than STATS_TTL are returned as is while a single background
+    thread fetches new ones, so concurrent pollers never wait on OME.
+    """
+    global _server_stats
+
+    client = current_app.ome_client
+    cached = _server_stats
+    now = time.monotonic()
+
+    if cached is None or cached[0] is not client or now - cached[1] >= STATS_MAX_AGE:
+        stats = client.get_server_stats()
+        _server_stats = (client, now, stats)
+        return stats
+
+    if now - cached[1] >= STATS_TTL and _stats_refresh.acquire(blocking=False):
+        threading.Thread(target=_refresh_server_stats, args=(client,), daemon=True).start()
+
+    return cached[2]
+
+
+def _refresh_server_stats(client):
+    """Fetch server stats into the cache, run from a background thread"""
+    global _server_stats
+    try:
+        _server_stats = (client, time.monotonic(), client.get_server_stats())
+    except OMEAPIException as e:
+        logger.warning("Error refreshing server stats: %s", e)
+    finally:
+        _stats_refresh.release()
+
+
+def invalidate_vhost(vhost_name: str):
+    """Drop cached listings and details affected by a change to a virtual host"""
+    _ttl.pop(('vhosts',))
+    _ttl.pop(('vhost', vhost_name))
+    _ttl.pop(('apps', vhost_name))
+
+
+def invalidate_app(vhost_name: str, app_name: str):
+    """Drop cached listings and details affected by a change to an application"""
+    _ttl.pop(('apps', vhost_name))
+    _ttl.pop(('app', vhost_name, app_name))
+    _ttl.pop(('streams', vhost_name, app_name))
+
+
+def invalidate_stream(vhost_name: str, app_name: str):
+    """Drop the cached stream listing of an application"""
+    _ttl.pop(('streams', vhost_name, app_name))
+
+
+def clear():
+    """Drop all cached listings, e.g. after the OME client is replaced"""
+    global _server_stats
+    _ttl.clear()
+    _server_stats = None
@@ -2,13 +2,21 @@
 OvenMediaEngine REST API Client
 Handles all communication with OvenMediaEngine's REST API
 """
+import base64
+import time
+import orjson
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional
-from requests.auth import HTTPBasicAuth
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Bound once at import; OME stats payloads are large and decoded on every poll
+_loads = orjson.loads
+
 
 class OMEAPIException(Exception):
     """Exception raised for OME API errors"""
@@ -18,6 +26,13 @@ class OMEAPIException(Exception):
 class OMEClient:
     """Client for OvenMediaEngine REST API"""
     
+    # Keep-alive connections shared by all request threads of a worker
+    POOL_CONNECTIONS = 50
+    POOL_MAXSIZE = 200
+    
+    # Seconds a health check result is reused
+    HEALTH_TTL = 1.5
+    
     def __init__(self, api_url: str, access_token: str, timeout: int = 30):
         """
         Initialize OME API client
@@ -28,18 +43,34 @@ class OMEClient:
             timeout: Request timeout in seconds
         """
         self.api_url = api_url.rstrip('/')
+        self._url_prefix = self.api_url
         self.access_token = access_token
         self.timeout = timeout
         self.session = requests.Session()
+        # Last health check as (checked_at, healthy)
+        self._last_health = (float('-inf'), False)
         
-        # Setup authentication
-        if ':' in access_token:
-            # Format: user:password
-            user, password = access_token.split(':', 1)
-            self.session.auth = HTTPBasicAuth(user, password)
-        else:
-            # Use as Bearer token
-            self.session.headers.update({'Authorization': f'Basic {access_token}'})
+        # Pool connections and retry idempotent calls on transient gateway errors;
+        # the final error response is still handled by raise_for_status
+        adapter = HTTPAdapter(
+            pool_connections=self.POOL_CONNECTIONS,
+            pool_maxsize=self.POOL_MAXSIZE,
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.1,
+                status_forcelist=[502, 503, 504],
+                raise_on_status=False
+            )
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # Setup authentication: OME expects "Basic base64(AccessToken)", which for
+        # a user:password token is also what HTTPBasicAuth would send. The header
+        # is encoded once here instead of by an auth hook on every request.
+        if access_token:
+            encoded = base64.b64encode(access_token.encode('utf-8')).decode('ascii')
+            self.session.headers['Authorization'] = f'Basic {encoded}'
     
     def _request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
         """
@@ -48,7 +79,7 @@ class OMEClient:
         Args:
             method: HTTP method (GET, POST, PUT, DELETE)
             endpoint: API endpoint
-            **kwargs: Additional arguments for requests
+            **kwargs: Additional arguments for requests (the timeout is always self.timeout)
             
         Returns:
             Response object
@@ -56,42 +87,41 @@ class OMEClient:
         Raises:
             OMEAPIException: If request fails
         """
-        url = f"{self.api_url}{endpoint}"
-        kwargs.setdefault('timeout', self.timeout)
-        
         try:
-            response = self.session.request(method, url, **kwargs)
-            response.raise_for_status()
-            return response
-        except requests.exceptions.HTTPError as e:
-            error_msg = f"HTTP {e.response.status_code}: {e.response.text}"
-            logger.error(f"OME API error: {error_msg}")
-            raise OMEAPIException(error_msg)
+            response = self.session.request(
+                method, self._url_prefix + endpoint, timeout=self.timeout, **kwargs
+            )
         except requests.exceptions.RequestException as e:
-            logger.error(f"OME API connection error: {str(e)}")
+            logger.error("OME API connection error: %s", e)
             raise OMEAPIException(f"Connection error: {str(e)}")
+        
+        if response.status_code >= 400:
+            error_msg = f"HTTP {response.status_code}: {response.text}"
+            logger.error("OME API error: %s", error_msg)
+            raise OMEAPIException(error_msg)
+        return response
     
     # VirtualHost Management
     
     def list_vhosts(self) -> List[Dict[str, Any]]:
         """Get list of all virtual hosts"""
         response = self._request('GET', '/v1/vhosts')
-        return response.json().get('response', [])
+        return _loads(response.content).get('response', [])
     
     def get_vhost(self, vhost_name: str) -> Dict[str, Any]:
         """Get details of a specific virtual host"""
         response = self._request('GET', f'/v1/vhosts/{vhost_name}')
-        return response.json().get('response', {})
+        return _loads(response.content).get('response', {})
     
     def create_vhost(self, vhost_config: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new virtual host"""
         response = self._request('POST', '/v1/vhosts', json=vhost_config)
-        return response.json().get('response', {})
+        return _loads(response.content).get('response', {})
     
     def update_vhost(self, vhost_name: str, vhost_config: Dict[str, Any]) -> Dict[str, Any]:
         """Update an existing virtual host"""
         response = self._request('PUT', f'/v1/vhosts/{vhost_name}', json=vhost_config)
-        return response.json().get('response', {})
+        return _loads(response.content).get('response', {})
     
     def delete_vhost(self, vhost_name: str) -> bool:
         """Delete a virtual host"""
@@ -103,22 +133,22 @@ class OMEClient:
     def list_apps(self, vhost_name: str) -> List[Dict[str, Any]]:
         """Get list of all applications in a virtual host"""
         response = self._request('GET', f'/v1/vhosts/{vhost_name}/apps')
-        return response.json().get('response', [])
+        return _loads(response.content).get('response', [])
     
     def get_app(self, vhost_name: str, app_name: str) -> Dict[str, Any]:
         """Get details of a specific application"""
         response = self._request('GET', f'/v1/vhosts/{vhost_name}/apps/{app_name}')
-        return response.json().get('response', {})
+        return _loads(response.content).get('response', {})
     
     def create_app(self, vhost_name: str, app_config: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new application"""
         response = self._request('POST', f'/v1/vhosts/{vhost_name}/apps', json=app_config)
-        return response.json().get('response', {})
+        return _loads(response.content).get('response', {})
     
     def update_app(self, vhost_name: str, app_name: str, app_config: Dict[str, Any]) -> Dict[str, Any]:
         """Update an existing application"""
         response = self._request('PUT', f'/v1/vhosts/{vhost_name}/apps/{app_name}', json=app_config)
-        return response.json().get('response', {})
+        return _loads(response.content).get('response', {})
     
     def delete_app(self, vhost_name: str, app_name: str) -> bool:
         """Delete an application"""
@@ -130,30 +160,57 @@ class OMEClient:
     def list_streams(self, vhost_name: str, app_name: str) -> List[Dict[str, Any]]:
         """Get list of all streams in an application"""
         response = self._request('GET', f'/v1/vhosts/{vhost_name}/apps/{app_name}/streams')
-        return response.json().get('response', [])
+        return _loads(response.content).get('response', [])
     
     def get_stream(self, vhost_name: str, app_name: str, stream_name: str) -> Dict[str, Any]:
         """Get details of a specific stream"""
         response = self._request('GET', f'/v1/vhosts/{vhost_name}/apps/{app_name}/streams/{stream_name}')
-        return response.json().get('response', {})
+        return _loads(response.content).get('response', {})
     
     def create_stream(self, vhost_name: str, app_name: str, stream_config: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new stream (push publishing)"""
         response = self._request('POST', f'/v1/vhosts/{vhost_name}/apps/{app_name}/streams', json=stream_config)
-        return response.json().get('response', {})
+        return _loads(response.content).get('response', {})
     
     def delete_stream(self, vhost_name: str, app_name: str, stream_name: str) -> bool:
         """Delete a stream"""
         response = self._request('DELETE', f'/v1/vhosts/{vhost_name}/apps/{app_name}/streams/{stream_name}')
         return response.status_code == 200
     
+    def list_all_streams(self, max_workers: int = 16) -> List[Dict[str, Any]]:
+        """
+        Get all streams of all applications in all virtual hosts
+        
+        The per-vhost and per-application listings are independent requests,
+        so they are issued concurrently over the pooled session.
+        
+        Args:
+            max_workers: Maximum number of requests in flight
+            
+        Returns:
+            List of dicts with 'vhost', 'app' and 'stream' names, in listing order
+        """
+        vhosts = self.list_vhosts()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            apps = [
+                (vhost, app)
+                for vhost, vhost_apps in zip(vhosts, executor.map(self.list_apps, vhosts))
+                for app in vhost_apps
+            ]
+            streams = executor.map(lambda pair: self.list_streams(*pair), apps)
+            return [
+                {'vhost': vhost, 'app': app, 'stream': stream}
+                for (vhost, app), app_streams in zip(apps, streams)
+                for stream in app_streams
+            ]
+    
     # Statistics
     
     def get_server_stats(self) -> Dict[str, Any]:
         """Get server statistics"""
         try:
             response = self._request('GET', '/v1/stats/current')
-            return response.json().get('response', {})
+            return _loads(response.content).get('response', {})
         except OMEAPIException:
             # Stats endpoint might not be available in all versions
             return {}
@@ -162,16 +219,27 @@ class OMEClient:
         """Get statistics for a specific stream"""
         try:
             response = self._request('GET', f'/v1/stats/current/vhosts/{vhost_name}/apps/{app_name}/streams/{stream_name}')
-            return response.json().get('response', {})
+            return _loads(response.content).get('response', {})
         except OMEAPIException:
             return {}
     
     # Health Check
     
     def health_check(self) -> bool:
-        """Check if OME API is accessible"""
+        """Check if OME API is accessible, reusing results for HEALTH_TTL seconds"""
+        checked_at, healthy = self._last_health
+        now = time.monotonic()
+        if now - checked_at < self.HEALTH_TTL:
+            return healthy
+        
         try:
-            self._request('GET', '/v1/vhosts')
-            return True
+            # Only the status matters: discard the vhost list unread and
+            # undecoded, but drain it so the connection goes back to the pool
+            response = self._request('GET', '/v1/vhosts', stream=True)
+            response.raw.drain_conn()
+            response.close()
+            healthy = True
         except OMEAPIException:
-            return False
+            healthy = False
+        self._last_health = (now, healthy)
+        return healthy
@@ -2,10 +2,67 @@
 XML Parser for OvenMediaEngine Server.xml configuration
 Provides bidirectional conversion between XML and Python dictionaries
 """
-import xml.dom.minidom
+import functools
+import os
+import shutil
+import sys
+import tempfile
+import xml.etree.ElementTree as etree
+from xml.parsers import expat
 import xmltodict
 from typing import Dict, Any, Optional
 
+def _intern_key(path, key, value):
+    """
+    xmltodict postprocessor that interns dictionary keys
+    
+    Expat only shares tag names within one parse, and attribute keys are
+    rebuilt with their '@' prefix for every element, so without this each
+    cached config and snapshot holds its own copies of 'Name', 'Port', ...
+    """
+    return sys.intern(key), value
+
+
+# Options for every xmltodict.parse call. xmltodict already turns on Expat's
+# buffer_text and joins text chunks from a list, so reads stay linear; it
+# does not accept buffer_text as a keyword itself.
+_XMLTODICT_KW = dict(
+    process_namespaces=False,
+    xml_attribs=True,
+    disable_entities=True,
+    process_comments=False,
+    postprocessor=_intern_key
+)
+
+
+# Server children reported by extract_server_info
+_SERVER_INFO_TAGS = frozenset({'Name', 'IP', 'StunServer', 'Bind'})
+
+
+def _local_name(tag: str) -> str:
+    """Tag name without the '{namespace}' ElementTree adds under an xmlns"""
+    return tag.rpartition('}')[2]
+
+
+def _element_to_dict(elem) -> Any:
+    """
+    Convert an iterparse element subtree with xmltodict
+    
+    Namespaces are stripped from the tags first: with a default xmlns on
+    <Server> xmltodict reports plain tag names, while ElementTree would
+    serialize the subtree with generated 'ns0:' prefixes.
+    """
+    for child in elem.iter():
+        child.tag = _local_name(child.tag)
+    elem.tail = None
+    return xmltodict.parse(etree.tostring(elem), **_XMLTODICT_KW)[elem.tag]
+
+
+@functools.lru_cache(maxsize=256)
+def _split_path(path: str) -> tuple:
+    """Split a dot-separated path into its keys, once per distinct path"""
+    return tuple(path.split('.'))
+
 
 class XMLParser:
     """Parser for OvenMediaEngine XML configurations"""
@@ -26,9 +83,10 @@ class XMLParser:
             ValueError: If XML is invalid
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                xml_content = f.read()
-            return XMLParser.parse_string(xml_content)
+            # Hand Expat the binary file so it reads it in chunks, without a
+            # decoded copy of the whole document in memory
+            with open(file_path, 'rb') as f:
+                return xmltodict.parse(f, **_XMLTODICT_KW)
         except FileNotFoundError:
             raise FileNotFoundError(f"Configuration file not found: {file_path}")
         except Exception as e:
@@ -49,7 +107,7 @@ class XMLParser:
             ValueError: If XML is invalid
         """
         try:
-            return xmltodict.parse(xml_string, process_namespaces=False)
+            return xmltodict.parse(xml_string, **_XMLTODICT_KW)
         except Exception as e:
             raise ValueError(f"Error parsing XML string: {str(e)}")
     
@@ -83,11 +141,87 @@ class XMLParser:
         """
         try:
             xml_string = XMLParser.dict_to_xml(data, pretty=pretty)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(xml_string)
+            XMLParser.write_string(xml_string, file_path)
         except Exception as e:
             raise IOError(f"Error writing XML file: {str(e)}")
     
+    @staticmethod
+    def write_string(xml_string: str, file_path: str):
+        """
+        Atomically replace a file with XML content
+        
+        The content is written and fsync'd to a temporary file in the same
+        directory, which is then renamed over the destination, so readers
+        and crashes never leave a partially written file behind. Where the
+        rename is not possible (no write access to the directory, or a
+        single-file bind mount) the file is written in place instead.
+        
+        Args:
+            xml_string: XML content to write
+            file_path: Destination file path, symlinks are followed
+        """
+        payload = xml_string.encode('utf-8')
+        # Replace the file a symlinked Server.xml points to, not the link
+        file_path = os.path.realpath(file_path)
+        if not os.path.exists(file_path):
+            # Nothing to protect, and open() applies the usual umask-based mode
+            XMLParser._write_in_place(payload, file_path)
+            return
+        
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix='.tmp')
+        except PermissionError:
+            # No write access to the directory
+            XMLParser._write_in_place(payload, file_path)
+            return
+        
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            XMLParser._copy_ownership(file_path, tmp_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        
+        try:
+            os.replace(tmp_path, file_path)
+        except OSError:
+            # The file cannot be renamed over, e.g. EBUSY on a single-file
+            # bind mount or EXDEV across mounts
+            os.unlink(tmp_path)
+            XMLParser._write_in_place(payload, file_path)
+    
+    @staticmethod
+    def _copy_ownership(src: str, dst: str):
+        """
+        Give the temporary file the permissions, owner and SELinux label of
+        the file it replaces, so OME can still read its config
+        
+        The owner and label are best effort: copying them needs privileges
+        the UI process may not have.
+        """
+        # mkstemp creates the file as 0600 and owned by this process
+        shutil.copymode(src, dst)
+        st = os.stat(src)
+        try:
+            os.chown(dst, st.st_uid, st.st_gid)
+        except PermissionError:
+            pass
+        if hasattr(os, 'getxattr'):
+            try:
+                os.setxattr(dst, 'security.selinux', os.getxattr(src, 'security.selinux'))
+            except OSError:
+                # No label, SELinux disabled or not permitted
+                pass
+    
+    @staticmethod
+    def _write_in_place(payload: bytes, file_path: str):
+        """Truncate and rewrite a file with the given bytes"""
+        with open(file_path, 'wb') as f:
+            f.write(payload)
+    
     @staticmethod
     def validate_xml(xml_string: str) -> tuple[bool, Optional[str]]:
         """
@@ -99,10 +233,11 @@ class XMLParser:
         Returns:
             Tuple of (is_valid, error_message)
         """
+        # Expat checks well-formedness while streaming, without building a tree
         try:
-            etree.fromstring(xml_string.encode('utf-8'))
+            expat.ParserCreate().Parse(xml_string, True)
             return True, None
-        except etree.XMLSyntaxError as e:
+        except expat.ExpatError as e:
             return False, str(e)
     
     @staticmethod
@@ -118,9 +253,8 @@ class XMLParser:
         Returns:
             Value at path or default
         """
-        keys = path.split('.')
         value = data
-        for key in keys:
+        for key in _split_path(path):
             if isinstance(value, dict) and key in value:
                 value = value[key]
             else:
@@ -137,7 +271,7 @@ class XMLParser:
             path: Dot-separated path
             value: Value to set
         """
-        keys = path.split('.')
+        keys = _split_path(path)
         current = data
         for key in keys[:-1]:
             if key not in current:
@@ -158,11 +292,78 @@ class XMLParser:
         """
         server = config.get('Server', {})
         
+        # xmltodict returns a dict for a single VirtualHost and None for an
+        # empty <VirtualHosts/>
+        vhosts = (server.get('VirtualHosts') or {}).get('VirtualHost') or []
+        
+        return {
+            'version': server.get('@version', 'unknown'),
+            'name': server.get('Name', 'OvenMediaEngine'),
+            'ip': server.get('IP', '*'),
+            'stun_server': server.get('StunServer'),
+            'bind': server.get('Bind', {}),
+            'virtual_hosts_count': 1 if isinstance(vhosts, dict) else len(vhosts)
+        }
+    
+    @staticmethod
+    def extract_server_info_fast(file_path: str) -> Dict[str, Any]:
+        """
+        Extract key server information straight from an XML file
+        
+        Same result as extract_server_info(parse_file(file_path)), but only
+        the Server children it reports are converted to dictionaries; the
+        rest of the document is streamed past and VirtualHosts are counted
+        (including empty <VirtualHost/> elements, which xmltodict drops).
+        
+        Args:
+            file_path: Path to the XML file
+            
+        Returns:
+            Dictionary with server metadata
+            
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            ValueError: If XML is invalid
+        """
+        server = {}
+        vhosts_count = 0
+        tags = []
+        elements = []
+        try:
+            for event, elem in etree.iterparse(file_path, events=('start', 'end')):
+                if event == 'start':
+                    tags.append(_local_name(elem.tag))
+                    elements.append(elem)
+                    if tags == ['Server']:
+                        server['@version'] = elem.get('version', 'unknown')
+                    continue
+                
+                tag = tags.pop()
+                elements.pop()
+                depth = len(tags)
+                if depth == 1 and tags[0] == 'Server' and tag in _SERVER_INFO_TAGS:
+                    value = _element_to_dict(elem)
+                    # Repeated tags become a list, as xmltodict does
+                    if tag in server:
+                        previous = server[tag]
+                        value = (previous if isinstance(previous, list) else [previous]) + [value]
+                    server[tag] = value
+                elif depth == 2 and tag == 'VirtualHost' and tags[1] == 'VirtualHosts':
+                    vhosts_count += 1
+                
+                # Drop finished Server children and VirtualHost subtrees
+                if depth == 1 or (depth == 2 and tags[1] == 'VirtualHosts'):
+                    elements[-1].remove(elem)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Configuration file not found: {file_path}")
+        except etree.ParseError as e:
+            raise ValueError(f"Error parsing XML file: {str(e)}")
+        
         return {
             'version': server.get('@version', 'unknown'),
             'name': server.get('Name', 'OvenMediaEngine'),
-            'ip': XMLParser.get_nested_value(server, 'IP', '*'),
-            'stun_server': XMLParser.get_nested_value(server, 'StunServer'),
+            'ip': server.get('IP', '*'),
+            'stun_server': server.get('StunServer'),
             'bind': server.get('Bind', {}),
-            'virtual_hosts_count': len(server.get('VirtualHosts', {}).get('VirtualHost', []))
+            'virtual_hosts_count': vhosts_count
         }
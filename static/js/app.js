@@ -63,6 +63,11 @@ async function apiRequest(endpoint, options = {}) {
             throw new Error('Unauthorized');
         }
 
+        // Deletes answer 204 No Content
+        if (response.status === 204) {
+            return null;
+        }
+
         const data = await response.json();
 
         if (!response.ok) {
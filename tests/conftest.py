@@ -0,0 +1,60 @@
+"""
+Test configuration
+Makes the application modules importable and provides a testing app
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Sample Server.xml with two virtual hosts
+SERVER_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<Server version="8"{xmlns}>
+  <Name>OvenMediaEngine</Name>
+  <IP>*</IP>
+  <Bind>
+    <Managers><API><Port>8081</Port></API></Managers>
+    <Providers><RTMP><Port>1935</Port></RTMP></Providers>
+  </Bind>
+  <VirtualHosts>
+    <VirtualHost>
+      <Name>default</Name>
+      <Host><Names><Name>*</Name></Names></Host>
+      <Applications>
+        <Application><Name>app</Name><Type>live</Type></Application>
+      </Applications>
+    </VirtualHost>
+    <VirtualHost>
+      <Name>second</Name>
+    </VirtualHost>
+  </VirtualHosts>
+</Server>
+'''
+
+
+@pytest.fixture(params=['', ' xmlns="http://www.ovenmediaengine.com/schema"'], ids=['plain', 'namespaced'])
+def server_xml(request, tmp_path):
+    """Path of a sample Server.xml, with and without a default xmlns"""
+    path = tmp_path / 'Server.xml'
+    path.write_text(SERVER_XML.format(xmlns=request.param), encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Testing application on an in-memory database with all tables created"""
+    # Non-debug apps log to logs/app.log relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    
+    from app import create_app
+    from models import db
+    
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        app.extensions['audit_queue'].flush()
+        db.session.remove()
+        db.drop_all()
@@ -0,0 +1,45 @@
+"""
+AuditQueue tests
+Entries must survive failed commits
+"""
+from sqlalchemy.exc import OperationalError
+
+from models import db, AuditLog
+from services.audit_queue import AuditQueue
+
+
+def _entry(description, user_id=1):
+    return dict(user_id=user_id, action=AuditLog.ACTION_LOGIN, resource_type='user', description=description)
+
+
+def _descriptions():
+    db.session.remove()
+    return sorted(log.description for log in AuditLog.query.all())
+
+
+def test_batch_is_retried_after_commit_failure(app, monkeypatch):
+    commit = db.session.commit
+    failures = []
+    
+    def locked_commit():
+        if len(failures) < 2:
+            failures.append(1)
+            raise OperationalError('INSERT', {}, Exception('database is locked'))
+        commit()
+    
+    monkeypatch.setattr(db.session, 'commit', locked_commit)
+    audit_queue = AuditQueue(app, retry_delays=(0, 0, 0))
+    for i in range(3):
+        audit_queue.put(_entry(str(i)))
+    audit_queue.flush()
+    
+    assert len(failures) == 2
+    assert _descriptions() == ['0', '1', '2']
+
+
+def test_bad_entry_does_not_drop_its_batch(app):
+    audit_queue = AuditQueue(app, retry_delays=(0,))
+    # user_id is NOT NULL, so this entry can never be written
+    audit_queue._write([_entry('ok-1'), _entry('bad', user_id=None), _entry('ok-2')])
+    
+    assert _descriptions() == ['ok-1', 'ok-2']
@@ -0,0 +1,80 @@
+"""
+ConfigManager tests
+Reading and writing Server.xml through the configuration manager
+"""
+import os
+
+from services.config_manager import ConfigManager
+
+OLD_XML = '<?xml version="1.0"?>\n<Server version="8"><Name>OME</Name></Server>\n'
+NEW_XML = '<?xml version="1.0"?>\n<Server version="8"><Name>OME2</Name></Server>\n'
+SINGLE_VHOST_XML = '<Server><VirtualHosts><VirtualHost><Name>only</Name></VirtualHost></VirtualHosts></Server>'
+
+
+def test_get_virtual_hosts(server_xml):
+    vhosts = ConfigManager(server_xml).get_virtual_hosts()
+    
+    assert [vhost['Name'] for vhost in vhosts] == ['default', 'second']
+    assert vhosts[0]['Applications']['Application']['Type'] == 'live'
+
+
+def test_get_virtual_hosts_normalizes_single_and_empty(tmp_path):
+    path = tmp_path / 'Server.xml'
+    path.write_text(SINGLE_VHOST_XML, encoding='utf-8')
+    assert ConfigManager(str(path)).get_virtual_hosts() == [{'Name': 'only'}]
+    
+    path.write_text('<Server><VirtualHosts/></Server>', encoding='utf-8')
+    assert ConfigManager(str(path)).get_virtual_hosts() == []
+
+
+def test_replace_raw_config_through_symlink(tmp_path):
+    real_dir = tmp_path / 'conf'
+    real_dir.mkdir()
+    real = real_dir / 'Server.xml'
+    real.write_text(OLD_XML, encoding='utf-8')
+    os.chmod(real, 0o644)
+    link = tmp_path / 'Server.xml'
+    link.symlink_to(real)
+    
+    old = ConfigManager(str(link)).replace_raw_config(NEW_XML)
+    
+    assert old == OLD_XML
+    assert link.is_symlink()
+    assert real.read_text(encoding='utf-8') == NEW_XML
+    assert os.stat(real).st_mode & 0o777 == 0o644
+    # No temporary files left next to either path
+    assert sorted(p.name for p in real_dir.iterdir()) == ['Server.xml']
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['Server.xml', 'conf']
+
+
+def test_replace_raw_config_falls_back_when_rename_fails(tmp_path, monkeypatch):
+    path = tmp_path / 'Server.xml'
+    path.write_text(OLD_XML, encoding='utf-8')
+    
+    def busy(src, dst):
+        raise OSError(16, 'Device or resource busy')
+    
+    # Single-file bind mounts cannot be renamed over
+    monkeypatch.setattr(os, 'replace', busy)
+    ConfigManager(str(path)).replace_raw_config(NEW_XML)
+    
+    assert path.read_text(encoding='utf-8') == NEW_XML
+    assert [p.name for p in tmp_path.iterdir()] == ['Server.xml']
+
+
+def test_replace_raw_config_keeps_owner_and_mode(tmp_path):
+    path = tmp_path / 'Server.xml'
+    path.write_text(OLD_XML, encoding='utf-8')
+    os.chmod(path, 0o640)
+    if os.geteuid() == 0:
+        # As root, hand the file to another user like an OME-owned config
+        os.chown(path, 4321, 4322)
+    before = os.stat(path)
+    
+    ConfigManager(str(path)).replace_raw_config(NEW_XML)
+    
+    after = os.stat(path)
+    assert path.read_text(encoding='utf-8') == NEW_XML
+    assert after.st_ino != before.st_ino
+    assert (after.st_uid, after.st_gid) == (before.st_uid, before.st_gid)
+    assert after.st_mode & 0o777 == 0o640
@@ -0,0 +1,52 @@
+"""
+ConfigurationSnapshot tests
+Compressed payload storage and the migration from plain text
+"""
+from models import db, ConfigurationSnapshot
+
+LEGACY_TABLE = '''
+CREATE TABLE configuration_snapshots (
+    id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL,
+    description VARCHAR(500),
+    configuration_type VARCHAR(50) NOT NULL,
+    configuration_data TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    created_at DATETIME NOT NULL,
+    is_active BOOLEAN
+)
+'''
+
+
+def _storage_classes():
+    return db.session.execute(
+        db.text('SELECT typeof(configuration_data) FROM configuration_snapshots ORDER BY id')
+    ).scalars().all()
+
+
+def test_upgrade_payload_storage_compresses_text_rows(app):
+    db.session.execute(db.text('DROP TABLE configuration_snapshots'))
+    db.session.execute(db.text(LEGACY_TABLE))
+    db.session.execute(db.text(
+        "INSERT INTO configuration_snapshots VALUES "
+        "(1, 1, 'old', 'server_xml', '<Server><Name>ñ</Name></Server>', 1, '2024-01-01 00:00:00', 0)"
+    ))
+    db.session.commit()
+    
+    assert ConfigurationSnapshot.upgrade_payload_storage() == 1
+    assert ConfigurationSnapshot.upgrade_payload_storage() == 0
+    assert _storage_classes() == ['blob']
+    
+    db.session.expire_all()
+    assert db.session.get(ConfigurationSnapshot, 1).configuration_data == '<Server><Name>ñ</Name></Server>'
+
+
+def test_new_snapshots_are_stored_compressed(app):
+    snapshot = ConfigurationSnapshot(version=1, configuration_data='<Server/>' * 100, user_id=1)
+    db.session.add(snapshot)
+    db.session.commit()
+    
+    assert _storage_classes() == ['blob']
+    assert ConfigurationSnapshot.upgrade_payload_storage() == 0
+    db.session.expire_all()
+    assert db.session.get(ConfigurationSnapshot, snapshot.id).configuration_data == '<Server/>' * 100
@@ -0,0 +1,14 @@
+"""
+XMLParser tests
+The streaming reader must match the full xmltodict parse
+"""
+from services.xml_parser import XMLParser
+
+
+def test_extract_server_info_fast_matches_full_parse(server_xml):
+    info = XMLParser.extract_server_info_fast(server_xml)
+    
+    assert info == XMLParser.extract_server_info(XMLParser.parse_file(server_xml))
+    assert info['version'] == '8'
+    assert info['virtual_hosts_count'] == 2
+    assert info['bind']['Providers']['RTMP']['Port'] == '1935'